@@ -3,61 +3,126 @@ import os
 from pathlib import Path
 import subprocess
 import hashlib
-from typing import List, Dict, Optional, Tuple
+import asyncio
+import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Dict, Optional, Tuple
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QLabel, QPushButton, QTextEdit, 
                             QFileDialog, QProgressBar, QComboBox, QMessageBox)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
-import openai
-import anthropic
-from dotenv import load_dotenv
+from PyQt6.QtCore import Qt, QObject, pyqtSignal
+from PyQt6.QtGui import QTextCursor
+from ai_clients import load_environment
 
 # Import our RABCDAsm wrapper
 from rabcdasm_wrapper import RABCDAsmWrapper
 
-class AIAnalysisThread(QThread):
-    """Thread for running AI analysis without blocking GUI"""
-    finished = pyqtSignal(str)
-    error = pyqtSignal(str)
+class AIRequestRunner(QObject):
+    """Runs AI requests concurrently on one background asyncio event loop
     
-    def __init__(self, model: str, api_key: str, content: str):
+    Requests share a single pooled async HTTP client, so any number of
+    in-flight queries overlap instead of each blocking its own thread.
+    Qt delivers the result signals to the GUI thread via queued connections,
+    each tagged with the id that submit() returned for the request.
+    """
+    chunk_received = pyqtSignal(int, str)
+    finished = pyqtSignal(int, str)
+    error = pyqtSignal(int, str)
+    
+    SYSTEM_PROMPT = "You are an expert in Flash SWF analysis and ActionScript. Help analyze and modify SWF files."
+    
+    def __init__(self):
         super().__init__()
-        self.model = model
-        self.api_key = api_key
-        self.content = content
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._http = None
+        self._clients = {}
+        self._request_ids = itertools.count(1)
         
-    def run(self):
+    def submit(self, model: str, api_key: str, content: str) -> int:
+        """Schedule a request on the event loop without blocking
+        
+        Returns the request id carried by the request's signals.
+        """
+        request_id = next(self._request_ids)
+        asyncio.run_coroutine_threadsafe(
+            self._ask(request_id, model, api_key, content), self._loop)
+        return request_id
+        
+    async def _ask(self, request_id: int, model: str, api_key: str, content: str):
         try:
-            if "gpt" in self.model.lower():
-                response = self._run_openai()
+            if "gpt" in model.lower():
+                response = await self._run_openai(request_id, model, api_key, content)
             else:
-                response = self._run_anthropic()
-            self.finished.emit(response)
+                response = await self._run_anthropic(request_id, model, api_key, content)
+            self.finished.emit(request_id, response)
         except Exception as e:
-            self.error.emit(str(e))
+            self.error.emit(request_id, str(e))
+            
+    def _client(self, provider: str, api_key: str):
+        """Return the async SDK client for a provider and key, creating it once"""
+        # The SDKs are imported on first use to keep GUI startup fast
+        import httpx
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+                timeout=60.0
+            )
+        key = (provider, api_key)
+        if key not in self._clients:
+            if provider == "openai":
+                import openai
+                self._clients[key] = openai.AsyncOpenAI(api_key=api_key, http_client=self._http)
+            else:
+                import anthropic
+                self._clients[key] = anthropic.AsyncAnthropic(api_key=api_key, http_client=self._http)
+        return self._clients[key]
             
-    def _run_openai(self) -> str:
-        client = openai.OpenAI(api_key=self.api_key)
-        response = client.chat.completions.create(
-            model=self.model,
+    async def _run_openai(self, request_id: int, model: str, api_key: str, content: str) -> str:
+        client = self._client("openai", api_key)
+        stream = await client.chat.completions.create(
+            model=model,
             messages=[
-                {"role": "system", "content": "You are an expert in Flash SWF analysis and ActionScript. Help analyze and modify SWF files."},
-                {"role": "user", "content": self.content}
-            ]
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "user", "content": content}
+            ],
+            stream=True
         )
-        return response.choices[0].message.content
+        parts = []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content or ""
+            if text:
+                parts.append(text)
+                self.chunk_received.emit(request_id, text)
+        return "".join(parts)
         
-    def _run_anthropic(self) -> str:
-        client = anthropic.Client(api_key=self.api_key)
-        response = client.messages.create(
-            model=self.model,
+    async def _run_anthropic(self, request_id: int, model: str, api_key: str, content: str) -> str:
+        client = self._client("anthropic", api_key)
+        parts = []
+        async with client.messages.stream(
+            model=model,
             max_tokens=1000,
             messages=[{
                 "role": "user",
-                "content": self.content
+                "content": content
             }]
-        )
-        return response.content
+        ) as stream:
+            async for text in stream.text_stream:
+                parts.append(text)
+                self.chunk_received.emit(request_id, text)
+        return "".join(parts)
+    
+    def close(self):
+        """Close pooled connections and stop the event loop"""
+        if self._http is not None:
+            asyncio.run_coroutine_threadsafe(self._http.aclose(), self._loop).result()
+            self._http = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
 
 class SWFAnalyzer:
     """Handles SWF file analysis and modification"""
@@ -69,45 +134,61 @@ class SWFAnalyzer:
         """Analyze a SWF file and return its structure"""
         result = {
             'size': os.path.getsize(swf_path),
-            'sha256': self._get_file_hash(swf_path),
+            'sha256': None,
             'abc_files': [],
             'resources': []
         }
         
-        # Extract ABC files
-        abc_files = self.rabcdasm.extract_abc(swf_path)
-        result['abc_files'] = abc_files
-        
-        # Analyze each ABC file
-        for abc_file in abc_files:
-            asm_dir = self.rabcdasm.disassemble_abc(abc_file)
-            result['resources'].extend(self._analyze_asm_dir(asm_dir))
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            # Hash the SWF while abcexport reads it, so the second pass
+            # over the file is served from the page cache
+            hash_future = executor.submit(self._get_file_hash, swf_path)
+            
+            # Extract ABC files
+            abc_files = self.rabcdasm.extract_abc(swf_path)
+            result['abc_files'] = abc_files
+            
+            # Disassemble and scan each ABC file concurrently; the work happens
+            # in rabcdasm subprocesses and file I/O, so threads overlap fully
+            asm_dirs = list(executor.map(self.rabcdasm.disassemble_abc, abc_files))
+            for resources in executor.map(self._analyze_asm_dir, asm_dirs):
+                result['resources'].extend(resources)
+            
+            result['sha256'] = hash_future.result()
             
         return result
     
     def _get_file_hash(self, file_path: str) -> str:
         """Calculate SHA256 hash of a file"""
-        sha256_hash = hashlib.sha256()
         with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
+            # file_digest (Python 3.11+) runs the read/update loop in C
+            if hasattr(hashlib, 'file_digest'):
+                return hashlib.file_digest(f, 'sha256').hexdigest()
+            sha256_hash = hashlib.sha256()
+            for byte_block in iter(lambda: f.read(1 << 20), b""):
                 sha256_hash.update(byte_block)
         return sha256_hash.hexdigest()
     
+    def _iter_asasm(self, directory: str) -> Iterator[os.DirEntry]:
+        """Recursively yield directory entries for .asasm files"""
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self._iter_asasm(entry.path)
+                elif entry.name.endswith('.asasm'):
+                    yield entry
+    
     def _analyze_asm_dir(self, asm_dir: str) -> List[Dict]:
         """Analyze disassembled ABC directory for resources"""
-        resources = []
-        for root, _, files in os.walk(asm_dir):
-            for file in files:
-                if file.endswith('.asasm'):
-                    with open(os.path.join(root, file), 'r') as f:
-                        content = f.read()
-                        resources.append({
-                            'name': file,
-                            'type': 'ActionScript',
-                            'path': os.path.join(root, file),
-                            'size': len(content)
-                        })
-        return resources
+        return [
+            {
+                'name': entry.name,
+                'type': 'ActionScript',
+                'path': entry.path,
+                'size': entry.stat().st_size
+            }
+            for entry in self._iter_asasm(asm_dir)
+        ]
 
 class MainWindow(QMainWindow):
     """Main application window"""
@@ -116,6 +197,12 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.rabcdasm = RABCDAsmWrapper()
         self.analyzer = SWFAnalyzer(self.rabcdasm)
+        self.ai_runner = AIRequestRunner()
+        self.ai_runner.chunk_received.connect(self.handle_ai_chunk)
+        self.ai_runner.finished.connect(self.handle_ai_response)
+        self.ai_runner.error.connect(self.handle_ai_error)
+        # Output cursor of each in-flight AI request, keyed by request id
+        self._ai_cursors: Dict[int, QTextCursor] = {}
         self.init_ui()
         
     def init_ui(self):
@@ -182,10 +269,11 @@ class MainWindow(QMainWindow):
         layout.addWidget(ai_button)
         
         # Load environment variables
-        load_dotenv()
+        load_environment()
         
         self.current_file = None
         self.analysis_results = None
+        self._ai_preamble = ""
         
     def select_file(self):
         """Open file dialog to select SWF file"""
@@ -194,6 +282,7 @@ class MainWindow(QMainWindow):
         if file_name:
             self.current_file = file_name
             self.file_label.setText(os.path.basename(file_name))
+            self._ai_preamble = f"Analyzing SWF file: {file_name}\n\nUser query: "
             
     def analyze_swf(self):
         """Analyze the selected SWF file"""
@@ -209,6 +298,16 @@ class MainWindow(QMainWindow):
             results = self.analyzer.analyze_swf(self.current_file)
             self.analysis_results = results
             
+            # Render the AI context once; ask_ai only appends the query, and
+            # the unchanged prefix can hit provider-side prompt caches
+            self._ai_preamble = (
+                f"Analyzing SWF file: {self.current_file}\n"
+                f"File size: {results['size']} bytes\n"
+                f"Number of ABC files: {len(results['abc_files'])}\n"
+                f"Number of resources: {len(results['resources'])}\n\n"
+                "User query: "
+            )
+            
             # Display results
             self.output.append("=== SWF Analysis Results ===")
             self.output.append(f"File size: {results['size']} bytes")
@@ -277,17 +376,7 @@ class MainWindow(QMainWindow):
             return
             
         # Prepare context for AI
-        if self.analysis_results:
-            context = f"""
-            Analyzing SWF file: {self.current_file}
-            File size: {self.analysis_results['size']} bytes
-            Number of ABC files: {len(self.analysis_results['abc_files'])}
-            Number of resources: {len(self.analysis_results['resources'])}
-            
-            User query: {query}
-            """
-        else:
-            context = f"Analyzing SWF file: {self.current_file}\n\nUser query: {query}"
+        context = self._ai_preamble + query
             
         # Get appropriate API key
         if "gpt" in model.lower():
@@ -301,25 +390,45 @@ class MainWindow(QMainWindow):
                 QMessageBox.critical(self, "Error", "Anthropic API key not found in .env file")
                 return
                 
-        # Start AI analysis thread
+        # Give the request its own paragraph followed by an empty one, so
+        # text appended to the end of the output later lands after it
+        self.output.append("\n=== AI Analysis ===")
+        cursor = self.output.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertBlock()
+        cursor.insertBlock()
+        cursor.movePosition(QTextCursor.MoveOperation.PreviousBlock)
+        
+        # Schedule AI request on the shared event loop
         self.progress.setRange(0, 0)
-        self.ai_thread = AIAnalysisThread(model, api_key, context)
-        self.ai_thread.finished.connect(self.handle_ai_response)
-        self.ai_thread.error.connect(self.handle_ai_error)
-        self.ai_thread.start()
+        request_id = self.ai_runner.submit(model, api_key, context)
+        self._ai_cursors[request_id] = cursor
+        
+    def handle_ai_chunk(self, request_id: int, text: str):
+        """Insert a streamed chunk into its request's section of the output"""
+        self._ai_cursors[request_id].insertText(text)
         
-    def handle_ai_response(self, response: str):
+    def handle_ai_response(self, request_id: int, response: str):
         """Handle AI analysis response"""
-        self.output.append("\n=== AI Analysis ===")
-        self.output.append(response)
-        self.progress.setRange(0, 100)
-        self.progress.setValue(100)
+        # The text itself already arrived through handle_ai_chunk
+        self._end_ai_request(request_id, 100)
+        
+    def _end_ai_request(self, request_id: int, value: int):
+        """Forget a finished request; stop the progress bar after the last one"""
+        del self._ai_cursors[request_id]
+        if not self._ai_cursors:
+            self.progress.setRange(0, 100)
+            self.progress.setValue(value)
+        
+    def closeEvent(self, event):
+        """Shut down the AI request loop with the window"""
+        self.ai_runner.close()
+        super().closeEvent(event)
         
-    def handle_ai_error(self, error: str):
+    def handle_ai_error(self, request_id: int, error: str):
         """Handle AI analysis error"""
+        self._end_ai_request(request_id, 0)
         QMessageBox.critical(self, "AI Error", f"AI analysis failed: {error}")
-        self.progress.setRange(0, 100)
-        self.progress.setValue(0)
 
 def main():
     app = QApplication(sys.argv)
@@ -0,0 +1,66 @@
+"""
+Process-wide AI provider clients
+
+The .env file is parsed once and each SDK client is built once per API
+key, on top of a single keep-alive HTTP connection pool. The provider
+SDKs are only imported when a client is first requested, since importing
+them costs hundreds of milliseconds at startup.
+"""
+
+import os
+import atexit
+import importlib
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import anthropic
+    import httpx
+    import openai
+
+ENV_PATH = Path(__file__).parent.parent / '.env'
+
+
+@lru_cache(maxsize=None)
+def load_environment() -> None:
+    """Load environment variables from the project .env file once"""
+    from dotenv import load_dotenv
+    load_dotenv(ENV_PATH)
+    load_dotenv()
+
+
+@lru_cache(maxsize=None)
+def get_http_pool() -> 'httpx.Client':
+    """Return the connection pool shared by every provider client"""
+    httpx = importlib.import_module('httpx')
+    pool = httpx.Client(
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+        timeout=60.0
+    )
+    atexit.register(pool.close)
+    return pool
+
+
+@lru_cache(maxsize=None)
+def _openai_client(api_key: Optional[str]) -> 'openai.OpenAI':
+    openai = importlib.import_module('openai')
+    return openai.OpenAI(api_key=api_key, http_client=get_http_pool())
+
+
+@lru_cache(maxsize=None)
+def _anthropic_client(api_key: Optional[str]) -> 'anthropic.Anthropic':
+    anthropic = importlib.import_module('anthropic')
+    return anthropic.Anthropic(api_key=api_key, http_client=get_http_pool())
+
+
+def get_openai(api_key: Optional[str] = None) -> 'openai.OpenAI':
+    """Return the shared OpenAI client for api_key (default: OPENAI_API_KEY)"""
+    load_environment()
+    return _openai_client(api_key or os.getenv('OPENAI_API_KEY'))
+
+
+def get_anthropic(api_key: Optional[str] = None) -> 'anthropic.Anthropic':
+    """Return the shared Anthropic client for api_key (default: ANTHROPIC_API_KEY)"""
+    load_environment()
+    return _anthropic_client(api_key or os.getenv('ANTHROPIC_API_KEY'))
@@ -1,39 +1,73 @@
 import os
-from typing import Dict, Optional
+import re
+import time
+import itertools
+import threading
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 from PyQt6.QtCore import QObject, pyqtSignal
-import openai
-import anthropic
 from pathlib import Path
 import json
-import requests
-from dotenv import load_dotenv
+import httpx
+from ai_clients import load_environment, get_http_pool, get_openai, get_anthropic
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 class AIProcessor(QObject):
     """Handles AI model interactions and processing"""
     
+    BASE_PROMPT = ("You are an expert in Flash SWF analysis and ActionScript. \n"
+                   "Help analyze and modify SWF files safely and effectively.")
+    TASK_PREFIX = "Current task: "
+    
+    # Matches anywhere in a word, like the substring checks it replaces
+    UNSAFE_KEYWORDS = re.compile(r'delete|remove|format|overwrite', re.IGNORECASE)
+    
     # Signals for async processing
     processing_started = pyqtSignal()
     processing_finished = pyqtSignal(str)
     processing_error = pyqtSignal(str)
+    chunk_received = pyqtSignal(str)
+    processing_batch_finished = pyqtSignal(dict)
     
-    def __init__(self):
+    def __init__(self, response_cache_size: int = 128):
         super().__init__()
+        self.response_cache_size = response_cache_size
+        self._response_cache: OrderedDict[str, str] = OrderedDict()
+        self._analysis_json = (None, "")
         self.load_configuration()
         
     def load_configuration(self):
         """Load API keys and configuration"""
-        load_dotenv()
+        load_environment()
         
-        # Load API keys from environment
-        self.openai_key = os.getenv('OPENAI_API_KEY')
+        # Load API keys from environment; OPENAI_API_KEYS may list several
+        # comma-separated keys to spread requests across their rate limits
+        self.openai_keys = [key.strip() for key in os.getenv('OPENAI_API_KEYS', '').split(',') if key.strip()]
+        if not self.openai_keys and os.getenv('OPENAI_API_KEY'):
+            self.openai_keys = [os.getenv('OPENAI_API_KEY')]
+        self.openai_key = self.openai_keys[0] if self.openai_keys else None
         self.anthropic_key = os.getenv('ANTHROPIC_API_KEY')
         self.ollama_url = os.getenv('OLLAMA_URL', 'http://localhost:11434')
         
-        # Initialize clients
+        # Clients are shared process-wide on one keep-alive connection pool
+        self._http = get_http_pool()
+        self._openai_clients = [get_openai(key) for key in self.openai_keys]
+        self._openai_rr = itertools.count()
+        per_key = int(os.getenv('OPENAI_MAX_CONCURRENCY_PER_KEY', '4'))
+        self._openai_slots = threading.BoundedSemaphore(per_key * max(len(self.openai_keys), 1))
         if self.openai_key:
-            self.openai_client = openai.OpenAI(api_key=self.openai_key)
+            self.openai_client = self._openai_clients[0]
         if self.anthropic_key:
-            self.anthropic_client = anthropic.Client(api_key=self.anthropic_key)
+            self.anthropic_client = get_anthropic(self.anthropic_key)
+    
+    def _next_openai_client(self):
+        """Pick the next OpenAI client in round-robin order"""
+        return self._openai_clients[next(self._openai_rr) % len(self._openai_clients)]
     
     def process_request(self, model: str, context: Dict, query: str) -> str:
         """Process an AI request with the specified model"""
@@ -43,6 +77,14 @@ class AIProcessor(QObject):
             # Prepare system message based on context
             system_message = self.prepare_system_message(context)
             
+            # Identical requests are answered from the response cache
+            cache_key = self._cache_key(model, system_message, query)
+            response = self._response_cache.get(cache_key)
+            if response is not None:
+                self._response_cache.move_to_end(cache_key)
+                self.processing_finished.emit(response)
+                return response
+            
             # Process with appropriate model
             if 'gpt' in model.lower():
                 response = self._process_openai(system_message, query)
@@ -51,6 +93,8 @@ class AIProcessor(QObject):
             else:
                 response = self._process_ollama(system_message, query)
             
+            self._store_response(cache_key, response)
+            
             self.processing_finished.emit(response)
             return response
             
@@ -59,12 +103,171 @@ class AIProcessor(QObject):
             self.processing_error.emit(error_msg)
             raise RuntimeError(error_msg)
     
+    def process_batch(self, requests: List[Tuple[str, Dict, str]],
+                      poll_interval: float = 30.0) -> Dict[str, str]:
+        """
+        Process many AI requests through the provider batch APIs
+        
+        OpenAI and Anthropic requests are submitted as one batch job per
+        provider and polled until finished; other models fall back to one
+        request at a time.
+        
+        Args:
+            requests: List of (model, context, query) tuples
+            poll_interval: Seconds to wait between batch status checks
+            
+        Returns:
+            Dictionary mapping each request's index (as a string) to its response
+        """
+        try:
+            self.processing_started.emit()
+            
+            results = {}
+            pending = {'openai': {}, 'anthropic': {}, 'ollama': {}}
+            cache_keys = {}
+            for index, (model, context, query) in enumerate(requests):
+                custom_id = str(index)
+                system_message = self.prepare_system_message(context)
+                cache_key = self._cache_key(model, system_message, query)
+                cached = self._response_cache.get(cache_key)
+                if cached is not None:
+                    results[custom_id] = cached
+                    continue
+                cache_keys[custom_id] = cache_key
+                if 'gpt' in model.lower():
+                    provider = 'openai'
+                elif 'claude' in model.lower():
+                    provider = 'anthropic'
+                else:
+                    provider = 'ollama'
+                pending[provider][custom_id] = (system_message, query)
+            
+            if pending['openai']:
+                results.update(self._batch_openai(pending['openai'], poll_interval))
+            if pending['anthropic']:
+                results.update(self._batch_anthropic(pending['anthropic'], poll_interval))
+            for custom_id, (system_message, query) in pending['ollama'].items():
+                results[custom_id] = self._process_ollama(system_message, query)
+            
+            for custom_id, cache_key in cache_keys.items():
+                if custom_id in results:
+                    self._store_response(cache_key, results[custom_id])
+            
+            self.processing_batch_finished.emit(results)
+            return results
+            
+        except Exception as e:
+            error_msg = f"AI batch processing error: {str(e)}"
+            self.processing_error.emit(error_msg)
+            raise RuntimeError(error_msg)
+    
+    def _batch_openai(self, items: Dict[str, Tuple[str, str]], poll_interval: float) -> Dict[str, str]:
+        """Run requests through the OpenAI Batch API"""
+        if not self.openai_key:
+            raise RuntimeError("OpenAI API key not configured")
+        
+        lines = []
+        for custom_id, (system_message, query) in items.items():
+            lines.append(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": "gpt-4",
+                    "messages": [
+                        {"role": "system", "content": system_message},
+                        {"role": "user", "content": query}
+                    ],
+                    "temperature": 0.7,
+                    "max_tokens": 1000
+                }
+            }))
+        
+        batch_file = self.openai_client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode('utf-8')),
+            purpose="batch"
+        )
+        batch = self.openai_client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(poll_interval)
+            batch = self.openai_client.batches.retrieve(batch.id)
+        if batch.status != "completed":
+            raise RuntimeError(f"OpenAI batch {batch.id} ended with status {batch.status}")
+        
+        results = {}
+        output = self.openai_client.files.content(batch.output_file_id).text
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response = entry.get('response') or {}
+            if response.get('status_code') == 200:
+                results[entry['custom_id']] = response['body']['choices'][0]['message']['content']
+        return results
+    
+    def _batch_anthropic(self, items: Dict[str, Tuple[str, str]], poll_interval: float) -> Dict[str, str]:
+        """Run requests through the Anthropic Message Batches API"""
+        if not self.anthropic_key:
+            raise RuntimeError("Anthropic API key not configured")
+        
+        batch = self.anthropic_client.messages.batches.create(requests=[
+            {
+                "custom_id": custom_id,
+                "params": {
+                    "model": "claude-3-sonnet-20240229",
+                    "max_tokens": 1000,
+                    "system": self._anthropic_system(system_message),
+                    "messages": [{
+                        "role": "user",
+                        "content": query
+                    }]
+                }
+            }
+            for custom_id, (system_message, query) in items.items()
+        ])
+        while batch.processing_status != "ended":
+            time.sleep(poll_interval)
+            batch = self.anthropic_client.messages.batches.retrieve(batch.id)
+        
+        results = {}
+        for entry in self.anthropic_client.messages.batches.results(batch.id):
+            if entry.result.type == "succeeded":
+                results[entry.custom_id] = "".join(
+                    block.text for block in entry.result.message.content
+                    if block.type == "text"
+                )
+        return results
+    
+    def _store_response(self, cache_key: str, response: str):
+        """Add a response to the LRU cache, evicting the oldest entry if full"""
+        self._response_cache[cache_key] = response
+        self._response_cache.move_to_end(cache_key)
+        if len(self._response_cache) > self.response_cache_size:
+            self._response_cache.popitem(last=False)
+    
+    @staticmethod
+    def _cache_key(model: str, system_message: str, query: str) -> str:
+        """Compute the exact-match response cache key for a request"""
+        payload = json.dumps({"m": model, "s": system_message, "q": query}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def clear_cache(self):
+        """Discard all cached responses"""
+        self._response_cache.clear()
+    
     def prepare_system_message(self, context: Dict) -> str:
-        """Prepare system message based on context"""
-        messages = [
-            "You are an expert in Flash SWF analysis and ActionScript. ",
-            "Help analyze and modify SWF files safely and effectively."
-        ]
+        """
+        Prepare system message based on context
+        
+        Sections are always emitted in the same order (base prompt, file,
+        analysis, task) so that follow-up queries on the same SWF share
+        the longest possible prefix with provider-side prompt caches.
+        """
+        messages = [self.BASE_PROMPT]
         
         # Add context-specific information
         if context.get('file'):
@@ -72,61 +275,120 @@ class AIProcessor(QObject):
         
         if context.get('analysis'):
             messages.append("Analysis results available:")
-            messages.append(json.dumps(context['analysis'], indent=2))
+            messages.append(self._serialize_analysis(context['analysis']))
         
         if context.get('task'):
-            messages.append(f"Current task: {context['task']}")
+            messages.append(f"{self.TASK_PREFIX}{context['task']}")
         
         return "\n".join(messages)
     
+    def _anthropic_system(self, system_message: str) -> List[Dict]:
+        """
+        Split a system message into Anthropic system blocks
+        
+        The stable prefix is marked as a prompt-cache breakpoint; the task
+        line, which prepare_system_message always emits last, follows it
+        uncached so changing the task does not invalidate the prefix.
+        """
+        prefix, separator, task = system_message.rpartition(f"\n{self.TASK_PREFIX}")
+        if not separator:
+            prefix, task = system_message, ""
+        blocks = [{"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}]
+        if task:
+            blocks.append({"type": "text", "text": f"{self.TASK_PREFIX}{task}"})
+        return blocks
+    
+    def _serialize_analysis(self, analysis: Dict) -> str:
+        """
+        Serialize analysis results for the system message
+        
+        The last serialized analysis is reused while the same object is
+        passed in, so analysis dicts must not be mutated after they are
+        handed to the processor.
+        """
+        cached_analysis, cached_json = self._analysis_json
+        if cached_analysis is analysis:
+            return cached_json
+        
+        serialized = None
+        if orjson is not None:
+            try:
+                serialized = orjson.dumps(
+                    analysis, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                ).decode('utf-8')
+            except TypeError:
+                pass
+        if serialized is None:
+            serialized = json.dumps(analysis, indent=2)
+        
+        self._analysis_json = (analysis, serialized)
+        return serialized
+    
     def _process_openai(self, system_message: str, query: str) -> str:
         """Process request with OpenAI models"""
         if not self.openai_key:
             raise RuntimeError("OpenAI API key not configured")
             
-        response = self.openai_client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": query}
-            ],
-            temperature=0.7,
-            max_tokens=1000
-        )
-        
-        return response.choices[0].message.content
+        with self._openai_slots:
+            stream = self._next_openai_client().chat.completions.create(
+                model="gpt-4",
+                messages=[
+                    {"role": "system", "content": system_message},
+                    {"role": "user", "content": query}
+                ],
+                temperature=0.7,
+                max_tokens=1000,
+                stream=True
+            )
+            
+            parts = []
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content or ""
+                if text:
+                    parts.append(text)
+                    self.chunk_received.emit(text)
+        return "".join(parts)
     
     def _process_anthropic(self, system_message: str, query: str) -> str:
         """Process request with Anthropic models"""
         if not self.anthropic_key:
             raise RuntimeError("Anthropic API key not configured")
             
-        response = self.anthropic_client.messages.create(
+        parts = []
+        with self.anthropic_client.messages.stream(
             model="claude-3-sonnet-20240229",
             max_tokens=1000,
+            system=self._anthropic_system(system_message),
             messages=[{
                 "role": "user",
-                "content": f"{system_message}\n\nUser Query: {query}"
+                "content": query
             }]
-        )
-        
-        return response.content
+        ) as stream:
+            for text in stream.text_stream:
+                parts.append(text)
+                self.chunk_received.emit(text)
+        return "".join(parts)
     
     def _process_ollama(self, system_message: str, query: str) -> str:
         """Process request with local Ollama models"""
         try:
-            response = requests.post(
+            response = self._http.post(
                 f"{self.ollama_url}/api/generate",
                 json={
                     "model": "codellama",
                     "prompt": f"{system_message}\n\nUser Query: {query}",
                     "stream": False
-                }
+                },
+                # Local generation can run for minutes on a CPU, so only the
+                # hosted APIs keep the pool's 60 second timeout
+                timeout=None
             )
             response.raise_for_status()
             return response.json()['response']
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             raise RuntimeError(f"Ollama API error: {str(e)}")
     
     def validate_response(self, response: str, context: Dict) -> bool:
@@ -134,6 +396,5 @@ class AIProcessor(QObject):
         # Implement validation logic based on context
         if 'modify' in context.get('task', '').lower():
             # Extra validation for modification suggestions
-            unsafe_keywords = ['delete', 'remove', 'format', 'overwrite']
-            return not any(keyword in response.lower() for keyword in unsafe_keywords)
+            return self.UNSAFE_KEYWORDS.search(response) is None
         return True
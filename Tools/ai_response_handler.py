@@ -1,93 +1,230 @@
-import os
+import atexit
+import threading
 from pathlib import Path
-from dotenv import load_dotenv
-from openai import OpenAI
-from anthropic import Anthropic
 import json
+from ai_clients import get_openai, get_anthropic
+from semantic_cache import SemanticCache
 
-# Load environment variables
-env_path = Path(__file__).parent.parent / '.env'
-load_dotenv(env_path)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SYSTEM_PROMPT = ("You are a helpful assistant for the RABCDAsm project, "
+                 "focusing on Flash/ActionScript analysis and decompilation.")
+
+# Messages kept in the conversation window and in the history file
+HISTORY_WINDOW = 10
+
+def _load_line(line: bytes):
+    """Parse one JSONL history line"""
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+def _dump_line(entry) -> bytes:
+    """Serialize one history entry as a JSONL line"""
+    if orjson is not None:
+        return orjson.dumps(entry) + b"\n"
+    return json.dumps(entry).encode('utf-8') + b"\n"
+
+class HistoryLog:
+    """Append-only JSONL conversation history file
+    
+    Every handler using the same path shares one log, so there is a single
+    append handle and a single compaction on exit per file.
+    """
+    _logs = {}
+    _logs_lock = threading.Lock()
+    
+    @classmethod
+    def for_path(cls, path: Path) -> 'HistoryLog':
+        """Return the log for path, opening it on first use"""
+        path = path.resolve()
+        with cls._logs_lock:
+            log = cls._logs.get(path)
+            if log is None:
+                log = cls._logs[path] = cls(path)
+            return log
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._import_legacy_history()
+        self._file = open(self.path, 'ab')
+        atexit.register(self.compact)
+    
+    def _import_legacy_history(self):
+        """Convert conversation_history.json from before the JSONL format, once"""
+        legacy = self.path.with_suffix('.json')
+        if self.path.exists() or not legacy.exists():
+            return
+        try:
+            with open(legacy, 'r', encoding='utf-8') as f:
+                history = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(history, list):
+            self._write(history[-HISTORY_WINDOW:])
+    
+    def read(self):
+        """Return the last HISTORY_WINDOW entries of the file"""
+        history = []
+        if self.path.exists():
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    try:
+                        history.append(_load_line(line))
+                    except ValueError:
+                        continue
+        return history[-HISTORY_WINDOW:]
+    
+    def append(self, entry):
+        """Append one entry; it is flushed right away so a crash keeps it"""
+        with self._lock:
+            self._file.write(_dump_line(entry))
+            self._file.flush()
+    
+    def rewrite(self, entries):
+        """Replace the file contents with entries"""
+        with self._lock:
+            self._file.close()
+            self._write(entries)
+            self._file = open(self.path, 'ab')
+    
+    def _write(self, entries):
+        with open(self.path, 'wb') as f:
+            f.write(b"".join(_dump_line(entry) for entry in entries))
+    
+    def compact(self):
+        """Drop everything but the last HISTORY_WINDOW entries"""
+        self.rewrite(self.read())
 
 class AIResponseHandler:
     def __init__(self):
-        self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        self.anthropic_client = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+        # Process-wide clients sharing one keep-alive connection pool
+        self.openai_client = get_openai()
+        self.anthropic_client = get_anthropic()
         self.current_model = "gpt-4"  # Default model
+        self.temperature = 0.7
         
-        # Load conversation history from file if it exists
-        self.history_file = Path(__file__).parent / 'conversation_history.json'
+        # Load conversation history from file if it exists; new turns are
+        # appended to it and the file is compacted on exit
+        self.history_file = Path(__file__).parent / 'conversation_history.jsonl'
+        self._history_log = HistoryLog.for_path(self.history_file)
         self.conversation_history = self.load_history()
+        self._rebuild_messages()
+        
+        # Responses to semantically equivalent prompts are served locally
+        self.cache_history_turns = 4
+        self.semantic_cache = SemanticCache(self.history_file.with_name('semantic_cache'))
+        self.semantic_cache.warm_up()
     
     def load_history(self):
-        """Load conversation history from file"""
-        if self.history_file.exists():
-            try:
-                with open(self.history_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+        """Load the last 10 messages of conversation history from file"""
+        return self._history_log.read()
     
     def save_history(self):
-        """Save conversation history to file"""
-        with open(self.history_file, 'w') as f:
-            json.dump(self.conversation_history, f)
+        """Rewrite the history file with only the in-memory window"""
+        self._history_log.rewrite(self.conversation_history)
+    
+    def _rebuild_messages(self):
+        """Rebuild the provider message lists from conversation history"""
+        # Server-side OpenAI conversation state no longer matches the history
+        self._last_response_id = None
+        self._openai_msgs = [{"role": "system", "content": SYSTEM_PROMPT}]
+        self._anth_msgs = []
+        for msg in self.conversation_history:
+            self._append_messages(msg)
+    
+    def _append_messages(self, msg):
+        """Append one history message to both provider message lists"""
+        self._openai_msgs.append({"role": msg["role"], "content": msg["content"]})
+        self._anth_msgs.append({
+            "role": "assistant" if msg["role"] == "assistant" else "user",
+            "content": msg["content"]
+        })
     
     def add_to_history(self, role, content):
         """Add a message to conversation history"""
-        self.conversation_history.append({
+        msg = {
             "role": role,
             "content": content
-        })
+        }
+        self.conversation_history.append(msg)
+        self._append_messages(msg)
         # Keep only last 10 messages to avoid token limits
-        if len(self.conversation_history) > 10:
-            self.conversation_history = self.conversation_history[-10:]
-        self.save_history()
+        if len(self.conversation_history) > HISTORY_WINDOW:
+            del self.conversation_history[0]
+            del self._openai_msgs[1]
+            del self._anth_msgs[0]
+            # The server-side chain would still hold the dropped message
+            self._last_response_id = None
+        self._history_log.append(msg)
     
     def get_ai_response(self, user_input, model=None):
         """Get AI response using specified model"""
         try:
             if model:
                 self.current_model = model
+            
+            # Check the semantic cache before hitting the remote model
+            cache_key = f"{self.current_model}:{self.temperature}"
+            embedding = self.semantic_cache.embed(self._cache_prompt(user_input))
+            cached_response = self.semantic_cache.get(embedding, cache_key)
                 
             # Add user input to history
             self.add_to_history("user", user_input)
             
+            if cached_response is not None:
+                # The server never saw this turn, so the response chain breaks
+                self._last_response_id = None
+                self.add_to_history("assistant", cached_response)
+                return cached_response
+            
             if "gpt" in self.current_model:
-                response = self.openai_client.chat.completions.create(
+                # Continue the server-side conversation when it is intact so
+                # only the new turn is sent; otherwise resend the history
+                if self._last_response_id:
+                    conversation = user_input
+                else:
+                    conversation = self._openai_msgs[1:]
+                response = self.openai_client.responses.create(
                     model=self.current_model,
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant for the RABCDAsm project, "
-                         "focusing on Flash/ActionScript analysis and decompilation."},
-                        *[{"role": msg["role"], "content": msg["content"]} 
-                          for msg in self.conversation_history]
-                    ],
-                    temperature=0.7,
-                    max_tokens=150
+                    instructions=SYSTEM_PROMPT,
+                    input=conversation,
+                    previous_response_id=self._last_response_id,
+                    temperature=self.temperature,
+                    max_output_tokens=150
                 )
-                ai_response = response.choices[0].message.content
+                ai_response = response.output_text
+                self._last_response_id = response.id
                 
             elif "claude" in self.current_model:
-                messages = [
-                    {
-                        "role": "assistant" if msg["role"] == "assistant" else "user",
-                        "content": msg["content"]
-                    }
-                    for msg in self.conversation_history
-                ]
+                # A cache breakpoint on the newest message lets the next turn
+                # reuse everything up to here from Anthropic's prompt cache
+                latest = self._anth_msgs[-1]
+                messages = self._anth_msgs[:-1] + [{
+                    "role": latest["role"],
+                    "content": [{
+                        "type": "text",
+                        "text": latest["content"],
+                        "cache_control": {"type": "ephemeral"}
+                    }]
+                }]
                 response = self.anthropic_client.messages.create(
                     model=self.current_model,
                     max_tokens=150,
-                    temperature=0.7,
+                    temperature=self.temperature,
                     messages=messages,
-                    system="You are a helpful assistant for the RABCDAsm project, "
-                           "focusing on Flash/ActionScript analysis and decompilation."
+                    system=SYSTEM_PROMPT
                 )
                 ai_response = response.content[0].text
+                self._last_response_id = None
             
             # Add AI response to history
             self.add_to_history("assistant", ai_response)
+            self.semantic_cache.put(embedding, cache_key, ai_response)
             return ai_response
             
         except Exception as e:
@@ -95,6 +232,13 @@ class AIResponseHandler:
             print(error_msg)
             return error_msg
     
+    def _cache_prompt(self, user_input):
+        """Build the text embedded for semantic cache lookups"""
+        turns = self.conversation_history[-self.cache_history_turns:]
+        lines = [f"{msg['role']}: {msg['content']}" for msg in turns]
+        lines.append(f"user: {user_input}")
+        return "\n".join(lines)
+    
     def set_model(self, model_name):
         """Set the AI model to use"""
         valid_models = {
@@ -109,5 +253,5 @@ class AIResponseHandler:
     def clear_history(self):
         """Clear conversation history"""
         self.conversation_history = []
-        if self.history_file.exists():
-            self.history_file.unlink()
+        self._rebuild_messages()
+        self.save_history()
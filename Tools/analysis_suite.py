@@ -1,16 +1,47 @@
 from typing import Dict, List, Optional
 from pathlib import Path
-import subprocess
+import asyncio
+import copy
+import os
+import threading
 import json
 import logging
+from functools import lru_cache, partial
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, 
-                            QPushButton, QComboBox, QLabel, QTextEdit)
+                            QPushButton, QComboBox, QLabel, QTextEdit,
+                            QStackedWidget)
 from PyQt6.QtCore import Qt, pyqtSignal
 
+@lru_cache(maxsize=16)
+def _load_tools_config(path_str: str, mtime_ns: int) -> Dict:
+    """Parse a tools config file; mtime_ns invalidates entries when it changes"""
+    with open(path_str) as f:
+        return json.load(f)
+
+def _read_tools_config(path: Path) -> Optional[Dict]:
+    """Return the parsed config file at path, or None if it does not exist
+    
+    The result is a copy, since callers merge its nested values into the
+    live configuration and must not change the cached parse.
+    """
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return copy.deepcopy(_load_tools_config(str(path), mtime_ns))
+
+@lru_cache(maxsize=None)
+def _titleize(name: str) -> str:
+    """Turn a config key such as 'ida_pro' into a display name ('Ida Pro')"""
+    return name.replace('_', ' ').title()
+
 class AnalysisSuite(QWidget):
     """Integrated analysis tools manager for RABCDAsm"""
     
     analysis_complete = pyqtSignal(dict)  # Emits results when analysis is done
+    _tool_output = pyqtSignal(str)  # Carries tool output back to the GUI thread
+    
+    STREAM_LIMIT = 2 ** 20  # Buffer size of the tool output pipes
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -37,9 +68,21 @@ class AnalysisSuite(QWidget):
             }
         }
         
+        self._label_to_key = {_titleize(cat): cat for cat in self.tools_config}
+        self._tool_display = {
+            tool_name: _titleize(tool_name)
+            for tools in self.tools_config.values()
+            for tool_name in tools
+        }
+        self._pages: Dict[str, QWidget] = {}
+        self._status_labels: Dict[str, Dict[str, QLabel]] = {}
+        self._analysis_thread: Optional[threading.Thread] = None
+        self._last_saved_bytes: Optional[bytes] = None
+        
+        self.apply_styles()
         self.init_ui()
         self.load_config()
-        self.apply_styles()
+        self.build_tool_pages()
         
     def init_ui(self):
         """Initialize the analysis suite UI"""
@@ -49,14 +92,7 @@ class AnalysisSuite(QWidget):
         
         # Header
         header = QLabel("Analysis Tools Suite")
-        header.setStyleSheet("""
-            QLabel {
-                font-size: 18px;
-                font-weight: bold;
-                color: #000000;
-                padding: 8px 0;
-            }
-        """)
+        header.setObjectName("SuiteHeader")
         layout.addWidget(header)
         
         # Tool category selector
@@ -64,14 +100,9 @@ class AnalysisSuite(QWidget):
         category_layout.setSpacing(8)
         
         category_label = QLabel("Analysis Category:")
-        category_label.setStyleSheet("""
-            QLabel {
-                font-weight: bold;
-                color: #000000;
-            }
-        """)
+        category_label.setObjectName("CategoryLabel")
         self.category_combo = QComboBox()
-        self.category_combo.addItems([cat.replace('_', ' ').title() for cat in self.tools_config.keys()])
+        self.category_combo.addItems(list(self._label_to_key))
         self.category_combo.currentTextChanged.connect(self.update_tools_list)
         self.category_combo.setMinimumWidth(200)
         
@@ -82,38 +113,25 @@ class AnalysisSuite(QWidget):
         
         # Tools list container
         tools_container = QWidget()
-        tools_container.setStyleSheet(f"""
-            QWidget {{
-                background-color: #FFFFFF;
-                border: 1px solid #D0D9E4;
-                border-radius: 8px;
-            }}
-        """)
+        tools_container.setObjectName("ToolsContainer")
         tools_container_layout = QVBoxLayout(tools_container)
         tools_container_layout.setContentsMargins(12, 12, 12, 12)
         
-        self.tools_list = QWidget()
-        self.tools_layout = QVBoxLayout(self.tools_list)
-        self.tools_layout.setSpacing(8)
-        tools_container_layout.addWidget(self.tools_list)
+        self.tools_stack = QStackedWidget()
+        tools_container_layout.addWidget(self.tools_stack)
         
         layout.addWidget(tools_container)
         
         # Analysis output
         output_label = QLabel("Analysis Output")
-        output_label.setStyleSheet("""
-            QLabel {
-                font-weight: bold;
-                color: #000000;
-                padding-top: 8px;
-            }
-        """)
+        output_label.setObjectName("OutputLabel")
         layout.addWidget(output_label)
         
         self.output_text = QTextEdit()
         self.output_text.setReadOnly(True)
         self.output_text.setMinimumHeight(150)
         layout.addWidget(self.output_text)
+        self._tool_output.connect(self.output_text.append)
         
         # Control buttons
         buttons_layout = QHBoxLayout()
@@ -132,10 +150,8 @@ class AnalysisSuite(QWidget):
         buttons_layout.addWidget(analyze_btn)
         layout.addLayout(buttons_layout)
         
-        self.update_tools_list(self.category_combo.currentText())
-        
     def apply_styles(self):
-        """Apply custom styles to widgets"""
+        """Apply the stylesheet for the whole suite; widgets are styled by objectName"""
         self.setStyleSheet("""
             QWidget {
                 background-color: #F0F4F8;
@@ -171,44 +187,82 @@ class AnalysisSuite(QWidget):
                 border-radius: 6px;
                 padding: 8px;
             }
+            QLabel#SuiteHeader {
+                font-size: 18px;
+                font-weight: bold;
+                color: #000000;
+                padding: 8px 0;
+            }
+            QLabel#CategoryLabel {
+                font-weight: bold;
+                color: #000000;
+            }
+            QLabel#OutputLabel {
+                font-weight: bold;
+                color: #000000;
+                padding-top: 8px;
+            }
+            QWidget#ToolsContainer, QWidget#ToolsContainer QWidget {
+                background-color: #FFFFFF;
+                border: 1px solid #D0D9E4;
+                border-radius: 8px;
+            }
+            QWidget#ToolsContainer QPushButton#ConfigBtn {
+                background-color: #4A90E2;
+                color: #000000;
+                border: none;
+                padding: 3px 10px;
+                border-radius: 2px;
+            }
+            QWidget#ToolsContainer QPushButton#ConfigBtn:hover {
+                background-color: #FF6B00;
+            }
         """)
         
-    def update_tools_list(self, category: str):
-        """Update the tools list for the selected category"""
-        # Clear existing tools
-        while self.tools_layout.count():
-            child = self.tools_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
-                
-        # Add tools for selected category
-        for tool_name, tool_info in self.tools_config[category].items():
-            tool_widget = QWidget()
-            tool_layout = QHBoxLayout(tool_widget)
+    def build_tool_pages(self):
+        """Build one tools page per category, once, into the tools stack"""
+        for category, tools in self.tools_config.items():
+            page = QWidget()
+            page_layout = QVBoxLayout(page)
+            page_layout.setSpacing(8)
+            self._status_labels[category] = {}
             
-            # Tool name and status
-            tool_layout.addWidget(QLabel(tool_name.replace('_', ' ').title()))
-            status_label = QLabel("✓" if tool_info["enabled"] else "✗")
-            tool_layout.addWidget(status_label)
+            for tool_name, tool_info in tools.items():
+                tool_widget = QWidget()
+                tool_layout = QHBoxLayout(tool_widget)
+                
+                # Tool name and status
+                tool_layout.addWidget(QLabel(self._tool_display[tool_name]))
+                status_label = QLabel("✓" if tool_info["enabled"] else "✗")
+                tool_layout.addWidget(status_label)
+                self._status_labels[category][tool_name] = status_label
+                
+                # Configure button
+                config_btn = QPushButton("Configure")
+                config_btn.clicked.connect(partial(self.configure_tool, tool_name))
+                config_btn.setObjectName("ConfigBtn")
+                tool_layout.addWidget(config_btn)
+                
+                page_layout.addWidget(tool_widget)
+                
+            page_layout.addStretch()
+            self._pages[category] = page
+            self.tools_stack.addWidget(page)
             
-            # Configure button
-            config_btn = QPushButton("Configure")
-            config_btn.clicked.connect(lambda checked, t=tool_name: self.configure_tool(t))
-            config_btn.setStyleSheet("""
-                QPushButton {
-                    background-color: #4A90E2;
-                    color: #000000;
-                    border: none;
-                    padding: 3px 10px;
-                    border-radius: 2px;
-                }
-                QPushButton:hover {
-                    background-color: #FF6B00;
-                }
-            """)
-            tool_layout.addWidget(config_btn)
+        self.update_tools_list(self.category_combo.currentText())
+        
+    def update_tools_list(self, category: str):
+        """Show the tools page for the selected category display name"""
+        key = self._label_to_key.get(category)
+        if key in self._pages:
+            self.tools_stack.setCurrentWidget(self._pages[key])
             
-            self.tools_layout.addWidget(tool_widget)
+    def update_tool_status(self, category: str, tool_name: str):
+        """Refresh the status label of a single tool in place"""
+        label = self._status_labels.get(category, {}).get(tool_name)
+        if label is not None:
+            enabled = self.tools_config[category][tool_name]["enabled"]
+            label.setText("✓" if enabled else "✗")
             
     def configure_tool(self, tool_name: str):
         """Configure a specific analysis tool"""
@@ -216,29 +270,139 @@ class AnalysisSuite(QWidget):
         pass
         
     def run_analysis(self):
-        """Execute analysis using enabled tools"""
-        # TODO: Implement analysis execution
-        pass
+        """Execute analysis using enabled tools without blocking the GUI"""
+        if self._analysis_thread is not None and self._analysis_thread.is_alive():
+            self.output_text.append("Analysis already running")
+            return
+            
+        enabled = {
+            tool_name: tool_info
+            for tools in self.tools_config.values()
+            for tool_name, tool_info in tools.items()
+            if tool_info["enabled"] and tool_info["path"]
+        }
+        if not enabled:
+            self.output_text.append("No analysis tools enabled")
+            return
+            
+        # The tools run as asyncio subprocesses on a worker thread; signals
+        # emitted from there are queued to the GUI thread by Qt
+        self._analysis_thread = threading.Thread(
+            target=asyncio.run, args=(self._run_tools(enabled),), daemon=True
+        )
+        self._analysis_thread.start()
+        
+    async def _run_tools(self, enabled: Dict[str, Dict]):
+        """Run every enabled tool concurrently and report the results"""
+        results = await asyncio.gather(
+            *(self._run_tool(tool_name, tool_info) for tool_name, tool_info in enabled.items())
+        )
+        results = dict(zip(enabled, results))
+        
+        # Build the report once and append it in a single call; appending
+        # tens of MB of tool output piecemeal makes the text edit relayout
+        # on every chunk
+        report = []
+        for tool_name, result in results.items():
+            title = self._tool_display[tool_name]
+            if "error" in result:
+                report.append(f"[{title}] Error: {result['error']}")
+            else:
+                report.append(
+                    f"[{title}] exited with code {result['returncode']}\n"
+                    f"{result['stdout']}{result['stderr']}"
+                )
+        self._tool_output.emit("\n".join(report))
+        self.analysis_complete.emit(results)
+        
+    async def _run_tool(self, tool_name: str, tool_info: Dict) -> Dict:
+        """Launch one tool and collect its output"""
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                tool_info["path"], *tool_info.get("args", []),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=self.STREAM_LIMIT
+            )
+            # communicate() drains both pipes in large buffered reads
+            stdout, stderr = await proc.communicate()
+        except Exception as e:
+            logging.getLogger(__name__).error("Error running %s: %s", tool_name, e)
+            return {"error": str(e)}
+            
+        return {
+            "returncode": proc.returncode,
+            "stdout": stdout.decode(errors='replace'),
+            "stderr": stderr.decode(errors='replace')
+        }
         
     def load_config(self):
-        """Load tools configuration from file"""
-        config_path = Path(__file__).parent / "config" / "analysis_tools.json"
-        if config_path.exists():
-            with open(config_path) as f:
-                saved_config = json.load(f)
-                # Update existing config with saved values
-                for category in self.tools_config:
-                    if category in saved_config:
-                        for tool in self.tools_config[category]:
-                            if tool in saved_config[category]:
-                                self.tools_config[category][tool].update(
-                                    saved_config[category][tool]
-                                )
+        """Load tools configuration from file
+        
+        Per-category presets in config/presets/<category>.json are applied
+        first, then the saved analysis_tools.json on top. The files are
+        read concurrently.
+        """
+        config_dir = Path(__file__).parent / "config"
+        paths = [config_dir / "presets" / f"{category}.json" for category in self.tools_config]
+        paths.append(config_dir / "analysis_tools.json")
+        
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            configs = asyncio.run(self._load_config_files(paths))
+        else:
+            # Already inside an event loop; fall back to reading in order
+            configs = [_read_tools_config(path) for path in paths]
+            
+        *presets, saved_config = configs
+        for category, preset in zip(self.tools_config, presets):
+            if preset:
+                self._merge_tools(category, preset)
+                
+        if saved_config is not None:
+            # Update existing config with saved values
+            for category in self.tools_config:
+                if category in saved_config:
+                    self._merge_tools(category, saved_config[category])
+            # The file already holds this configuration, so saving it unchanged is a no-op
+            if saved_config == self.tools_config:
+                self._last_saved_bytes = self._serialize_config()
+                
+    async def _load_config_files(self, paths: List[Path]) -> List[Optional[Dict]]:
+        """Read several config files at once; missing files load as None"""
+        return await asyncio.gather(
+            *(asyncio.to_thread(_read_tools_config, path) for path in paths)
+        )
+        
+    def _merge_tools(self, category: str, tools: Dict):
+        """Update the known tools of a category with loaded values"""
+        for tool in self.tools_config[category]:
+            if tool in tools:
+                self.tools_config[category][tool].update(tools[tool])
                                 
+    def _serialize_config(self) -> bytes:
+        """Return the tools configuration as written to the config file"""
+        return json.dumps(self.tools_config, indent=4).encode('utf-8')
+        
     def save_config(self):
         """Save tools configuration to file"""
+        new_bytes = self._serialize_config()
+        if new_bytes == self._last_saved_bytes:
+            return
+            
         config_path = Path(__file__).parent / "config"
         config_path.mkdir(exist_ok=True)
+        config_file = config_path / "analysis_tools.json"
+        
+        # Write to a temporary file and swap it in, so a crash mid-write
+        # never leaves a truncated config behind
+        tmp_file = config_path / "analysis_tools.json.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(new_bytes)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, config_file)
         
-        with open(config_path / "analysis_tools.json", 'w') as f:
-            json.dump(self.tools_config, f, indent=4)
+        self._last_saved_bytes = new_bytes
+        _load_tools_config.cache_clear()
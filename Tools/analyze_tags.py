@@ -1,15 +1,44 @@
 """Analyze special encrypted tags in Evony SWF."""
+import hashlib
 import logging
+import mmap
 import os
 import json
-from evony_swf.utils.encryption import EncryptionAnalyzer
-from evony_swf.analyzers.abc_analyzer import ABCAnalyzer
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+if TYPE_CHECKING:
+    from evony_swf.utils.encryption import EncryptionAnalyzer
+    from evony_swf.analyzers.abc_analyzer import ABCAnalyzer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Hex encoders for bytes-like values, looked up by exact type
+_HEX_ENCODERS = {
+    bytes: bytes.hex,
+    bytearray: bytearray.hex,
+    memoryview: memoryview.hex,
+}
+
+def _default(obj):
+    """Serialize bytes-like values as hex strings for orjson."""
+    encode = _HEX_ENCODERS.get(type(obj))
+    if encode is not None:
+        return encode(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
 class BytesEncoder(json.JSONEncoder):
     """Custom JSON encoder that can handle bytes objects."""
     def default(self, obj):
-        if isinstance(obj, bytes):
-            return obj.hex()
+        encode = _HEX_ENCODERS.get(type(obj))
+        if encode is not None:
+            return encode(obj)
         return super().default(obj)
 
 def setup_logging():
@@ -19,33 +48,108 @@ def setup_logging():
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
 
+@lru_cache(maxsize=1)
+def _get_encryption_analyzer() -> 'EncryptionAnalyzer':
+    """Return the analyzer shared by every tag in this process."""
+    # Imported on first use so importing this module stays cheap
+    from evony_swf.utils.encryption import EncryptionAnalyzer
+    return EncryptionAnalyzer()
+
+@lru_cache(maxsize=1)
+def _get_abc_analyzer() -> 'ABCAnalyzer':
+    """Return the ABC analyzer shared by every tag in this process."""
+    from evony_swf.analyzers.abc_analyzer import ABCAnalyzer
+    return ABCAnalyzer()
+
+# (tag_code, content digest) -> (encryption_info, decrypted_data, size);
+# identical tag blobs recur across SWFs, so each is only analyzed once per
+# process. Entries are evicted oldest first once either limit is exceeded;
+# size counts the decrypted bytes held by the entry.
+_ANALYSIS_CACHE_SIZE = 4096
+_ANALYSIS_CACHE_BYTES = 64 * 1024 * 1024
+_analysis_cache: 'OrderedDict[tuple, tuple]' = OrderedDict()
+_analysis_cache_bytes = 0
+
+def _cached_size(encryption_info: dict, decrypted_data) -> int:
+    """Return the number of payload bytes a cache entry keeps alive."""
+    buffers = {id(value): len(value) for value in encryption_info.values()
+               if type(value) in _HEX_ENCODERS}
+    if decrypted_data is not None:
+        buffers[id(decrypted_data)] = len(decrypted_data)
+    return sum(buffers.values())
+
+def _analyze_encryption(tag_data, tag_code: int) -> tuple:
+    """Return (encryption_info, decrypted_data or None), memoized by content hash."""
+    global _analysis_cache_bytes
+    key = (tag_code, hashlib.blake2b(tag_data, digest_size=16).digest())
+    cached = _analysis_cache.get(key)
+    if cached is not None:
+        _analysis_cache.move_to_end(key)
+        return cached[:2]
+        
+    encryption_analyzer = _get_encryption_analyzer()
+    encryption_info = encryption_analyzer.analyze_tag(tag_data, tag_code)
+    decrypted_data = None
+    if encryption_info['encrypted']:
+        decrypted_data = encryption_analyzer.decrypt_tag(tag_data, encryption_info)
+        
+    size = _cached_size(encryption_info, decrypted_data)
+    if size <= _ANALYSIS_CACHE_BYTES:
+        _analysis_cache[key] = (encryption_info, decrypted_data, size)
+        _analysis_cache_bytes += size
+        while len(_analysis_cache) > _ANALYSIS_CACHE_SIZE or \
+                _analysis_cache_bytes > _ANALYSIS_CACHE_BYTES:
+            _analysis_cache_bytes -= _analysis_cache.popitem(last=False)[1][2]
+    return encryption_info, decrypted_data
+
+def _init_worker():
+    """Configure logging and build the analyzers once per worker process."""
+    setup_logging()
+    _get_encryption_analyzer()
+    _get_abc_analyzer()
+
 def analyze_tag(tag_path: str, tag_code: int, output_dir: str) -> dict:
     """Analyze a specific tag file."""
-    logger = logging.getLogger(__name__)
-    encryption_analyzer = EncryptionAnalyzer()
-    abc_analyzer = ABCAnalyzer()
-    
     try:
         with open(tag_path, 'rb') as f:
-            tag_data = f.read()
+            if os.fstat(f.fileno()).st_size == 0:
+                return _analyze_tag_data(b'', tag_path, tag_code, output_dir)
             
-        logger.debug(f"Read {len(tag_data)} bytes from {tag_path}")
+            # Map the file instead of copying it into a bytes object; the
+            # view is released before the mapping is closed
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, \
+                    memoryview(mapped) as tag_data:
+                return _analyze_tag_data(tag_data, tag_path, tag_code, output_dir)
+                
+    except Exception as e:
+        return _error_result(tag_path, tag_code, e)
+
+def _analyze_tag_data(tag_data, tag_path: str, tag_code: int, output_dir: str) -> dict:
+    """Analyze the contents of a tag file given as bytes or a memoryview."""
+    logger = logging.getLogger(__name__)
+    abc_analyzer = _get_abc_analyzer()
+    
+    # Errors are handled here, while the tag data is still mapped, so no
+    # traceback keeps a slice of the mapping alive when it is closed
+    try:
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Read %d bytes from %s", len(tag_data), tag_path)
         
-        # First check encryption
-        encryption_info = encryption_analyzer.analyze_tag(tag_data, tag_code)
-        logger.debug(f"Encryption analysis result: {encryption_info}")
+        # Check encryption and decrypt, reusing earlier results for identical tags
+        encryption_info, decrypted_data = _analyze_encryption(tag_data, tag_code)
+        if debug:
+            logger.debug("Encryption analysis result: %s", encryption_info)
         
         result = {
             'tag_code': tag_code,
             'path': tag_path,
             'size': len(tag_data),
-            'encryption': encryption_info
+            'encryption': dict(encryption_info)
         }
         
-        # If encrypted, try to decrypt
-        if encryption_info['encrypted']:
-            logger.info(f"Attempting to decrypt tag {tag_code} using {encryption_info['method']}")
-            decrypted_data = encryption_analyzer.decrypt_tag(tag_data, encryption_info)
+        if decrypted_data is not None:
+            logger.info("Decrypted tag %s using %s", tag_code, encryption_info['method'])
             result['decrypted_size'] = len(decrypted_data)
             
             # If it's an ABC tag (82), analyze the ActionScript
@@ -57,15 +161,66 @@ def analyze_tag(tag_path: str, tag_code: int, output_dir: str) -> dict:
         return result
         
     except Exception as e:
-        logger.error(f"Error analyzing tag {tag_path}: {str(e)}", exc_info=True)
-        return {
-            'tag_code': tag_code,
-            'path': tag_path,
-            'error': str(e)
-        }
+        return _error_result(tag_path, tag_code, e)
+
+def _error_result(tag_path: str, tag_code: int, error: Exception) -> dict:
+    """Log a failed tag analysis and build its result entry."""
+    logger = logging.getLogger(__name__)
+    logger.error("Error analyzing tag %s: %s", tag_path, error, exc_info=True)
+    return {
+        'tag_code': tag_code,
+        'path': tag_path,
+        'error': str(error)
+    }
+
+def _bucket_tag_files(tags_dir: str, tag_codes: list) -> dict:
+    """Map each tag code to the paths of its tag_<code>_* files."""
+    wanted = set(tag_codes)
+    buckets = defaultdict(list)
+    with os.scandir(tags_dir) as entries:
+        for entry in entries:
+            if not entry.name.startswith('tag_'):
+                continue
+            parts = entry.name.split('_', 2)
+            if len(parts) < 3:
+                continue
+            try:
+                code = int(parts[1])
+            except ValueError:
+                continue
+            if code in wanted:
+                buckets[code].append(entry.path)
+    return buckets
+
+def analyze_tag_code(tags_dir: str, tag_code: int, output_dir: str) -> Iterator[dict]:
+    """Analyze every tag_<code>_* file of a single tag code in this process.
+    
+    Results are yielded as each file is analyzed. For several codes, main()
+    buckets the directory in one scandir pass and analyzes the files in a
+    process pool instead.
+    """
+    for tag_path in Path(tags_dir).glob(f"tag_{tag_code}_*"):
+        yield analyze_tag(str(tag_path), tag_code, output_dir)
+
+def _dump_line(result: dict) -> bytes:
+    """Serialize one result as an NDJSON line, hex-encoding any bytes values."""
+    if orjson is not None:
+        return orjson.dumps(result, default=_default) + b'\n'
+    return (json.dumps(result, cls=BytesEncoder) + '\n').encode('utf-8')
+
+def _analyze_tag_star(task: tuple) -> dict:
+    """Unpack a (tag_path, tag_code, output_dir) task for executor.map."""
+    return analyze_tag(*task)
 
 def main():
     """Main entry point."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Analyze special encrypted tags in Evony SWF')
+    parser.add_argument('--tag-code', type=int,
+                        help='Analyze only this tag code, in this process')
+    args = parser.parse_args()
+    
     setup_logging()
     logger = logging.getLogger(__name__)
     
@@ -75,39 +230,56 @@ def main():
         output_dir = "j:/robobuilder/analysis_output"
         os.makedirs(output_dir, exist_ok=True)
         
-        logger.info(f"Analyzing tags from {tags_dir}")
-        logger.info(f"Output directory: {output_dir}")
+        logger.info("Analyzing tags from %s", tags_dir)
+        logger.info("Output directory: %s", output_dir)
+        
+        # Each result is written as one NDJSON line as soon as it arrives, so
+        # memory stays flat and a crash keeps everything analyzed so far
+        # (ndjson_to_json.py converts the file to the old JSON array format).
+        output_file = os.path.join(output_dir, "tag_analysis.ndjson")
+        
+        if args.tag_code is not None:
+            # A single code needs one glob and no process pool
+            logger.info("Analyzing tags with code %s", args.tag_code)
+            with open(output_file, 'wb') as f:
+                for result in analyze_tag_code(tags_dir, args.tag_code, output_dir):
+                    logger.info("Processed %s", result['path'])
+                    f.write(_dump_line(result))
+            logger.info("Analysis complete. Results saved to %s", output_file)
+            return
         
         # Special tags to analyze
         special_tags = [233, 396, 449, 82]  # Including DoABC (82)
-        results = []
+        tasks = []
         
-        # Process each tag
+        # Bucket tag files by code in a single directory pass
+        buckets = _bucket_tag_files(tags_dir, special_tags)
+        
+        # Collect each tag
         for tag_code in special_tags:
-            logger.info(f"Analyzing tags with code {tag_code}")
+            logger.info("Analyzing tags with code %s", tag_code)
             
-            # Find all instances of this tag
-            tag_files = [f for f in os.listdir(tags_dir) 
-                        if f.startswith(f"tag_{tag_code}_")]
+            # All instances of this tag
+            tag_paths = buckets[tag_code]
             
-            logger.info(f"Found {len(tag_files)} files for tag {tag_code}")
+            logger.info("Found %d files for tag %s", len(tag_paths), tag_code)
             
-            for tag_file in tag_files:
-                tag_path = os.path.join(tags_dir, tag_file)
-                logger.info(f"Processing {tag_file}")
-                
-                result = analyze_tag(tag_path, tag_code, output_dir)
-                results.append(result)
-                
-        # Save results using custom encoder
-        output_file = os.path.join(output_dir, "tag_analysis.json")
-        with open(output_file, 'w') as f:
-            json.dump(results, f, indent=2, cls=BytesEncoder)
+            for tag_path in tag_paths:
+                tasks.append((tag_path, tag_code, output_dir))
+        
+        # Analyze the tags in parallel; the work is CPU-bound, so use processes
+        workers = os.cpu_count() or 1
+        chunksize = max(1, min(32, len(tasks) // (workers * 4)))
+        with open(output_file, 'wb') as f, \
+                ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            for result in executor.map(_analyze_tag_star, tasks, chunksize=chunksize):
+                logger.info("Processed %s", result['path'])
+                f.write(_dump_line(result))
             
-        logger.info(f"Analysis complete. Results saved to {output_file}")
+        logger.info("Analysis complete. Results saved to %s", output_file)
         
     except Exception as e:
-        logger.error(f"Fatal error: {str(e)}", exc_info=True)
+        logger.error("Fatal error: %s", e, exc_info=True)
         raise
 
 if __name__ == "__main__":
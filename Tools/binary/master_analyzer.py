@@ -1,19 +1,107 @@
 import os
+import atexit
 import re
 import base64
 import zlib
 import logging
+import queue
+import mmap
+import struct
 import subprocess
+import sys
+import time
 import binascii
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
-import json
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
 import hashlib
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from Crypto.Cipher import AES, Blowfish, DES3
-from Crypto.Util.Padding import unpad
+from functools import lru_cache
+from itertools import islice
+from logging.handlers import QueueHandler, QueueListener
 import traceback
 
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+PATTERN_FLAGS = re.IGNORECASE | re.MULTILINE
+# Seconds between checks of the decompiler output directory
+DECOMPILE_POLL_INTERVAL = 0.2
+# Matches reported per implementation pattern per file
+MAX_IMPLEMENTATION_MATCHES = 20
+# Matches per category at which detect_patterns' frequency score is capped
+FREQUENCY_CAP = 10
+FUNCTION_NAME_PATTERN = re.compile(rb'function\s+(\w+)')
+CLASS_NAME_PATTERN = re.compile(rb'class\s+(\w+)')
+# Separator lines between files in concatenated decompiler output
+FILE_HEADER_PATTERN = re.compile(rb'^[ \t]*//-{60}.*$', re.MULTILINE)
+COMMENT_LINE_PATTERN = re.compile(rb'^[ \t]*//(.*)$', re.MULTILINE)
+# Compiled Hyperscan databases are kept here between runs
+PATTERN_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'evony_analyzer')
+
+class SboxPattern:
+    """Finds RC4 S-box candidates: 256-byte windows holding every byte value once
+    
+    Stands in for a compiled pattern in the pattern tables. Content that does
+    not contain all 256 byte values (any text source) is rejected in a single
+    pass. Otherwise windows are sampled every 16 bytes; a window overlapping
+    an S-box by at least 241 bytes has that many distinct values, and only
+    then are the offsets around it checked exactly.
+    """
+    pattern = rb'<rc4 s-box>'
+    step = 16
+    _all_bytes = bytes(range(256))
+    _window = re.compile(rb'.{256}', re.DOTALL)
+    
+    def finditer(self, content: bytes):
+        # Deleting every byte value found in content leaves the ones missing
+        if len(content) < 256 or self._all_bytes.translate(None, content):
+            return
+        last = len(content) - 256
+        pos = 0
+        next_free = 0  # Matches do not overlap, like re.finditer
+        while pos <= last + self.step - 1:
+            sample = min(pos, last)
+            if len(set(content[sample:sample + 256])) > 256 - self.step:
+                for start in range(max(next_free, sample - self.step + 1), sample + 1):
+                    if len(set(content[start:start + 256])) == 256:
+                        yield self._window.match(content, start)
+                        next_free = start + 256
+                        break
+            pos += self.step
+            
+    def findall(self, content: bytes) -> List[bytes]:
+        return [match.group() for match in self.finditer(content)]
+
+def _compile_patterns(patterns):
+    """Compile a list of patterns, or a category -> patterns table, once
+    
+    Already compiled patterns (and pattern-like objects such as SboxPattern)
+    are kept as they are. Patterns re rejects are logged and dropped, since
+    they can never match.
+    """
+    if isinstance(patterns, dict):
+        return {category: _compile_patterns(items) for category, items in patterns.items()}
+    compiled = []
+    for pattern in patterns:
+        if not isinstance(pattern, bytes):
+            compiled.append(pattern)
+            continue
+        try:
+            compiled.append(re.compile(pattern, PATTERN_FLAGS))
+        except re.error as e:
+            logging.getLogger(__name__).warning(f"Skipping invalid pattern {pattern}: {e}")
+    return tuple(compiled)
+
 @dataclass
 class AnalysisResult:
     success: bool
@@ -23,7 +111,593 @@ class AnalysisResult:
     decrypted_files: List[str]
     error: Optional[str] = None
 
+@dataclass
+class SuspiciousTable:
+    """Suspicious files stored column-wise, one list per field
+    
+    Rows are appended in lockstep and only built into per-file dicts by
+    to_json(), so the merge loop does no dict construction per file.
+    """
+    files: List[str] = field(default_factory=list)
+    encryption: List[Dict[str, float]] = field(default_factory=list)
+    obfuscation: List[Dict[str, float]] = field(default_factory=list)
+    evony_specific: List[Dict[str, float]] = field(default_factory=list)
+    as3_specific: List[Dict[str, float]] = field(default_factory=list)
+    contexts: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def append(self, file: str, file_result: Dict) -> None:
+        """Add a row from an analyze_source_file result"""
+        self.files.append(file)
+        self.encryption.append(file_result['encryption'])
+        self.obfuscation.append(file_result['obfuscation'])
+        self.evony_specific.append(file_result['evony_specific'])
+        self.as3_specific.append(file_result['as3_specific'])
+        self.contexts.append(file_result['context'])
+
+    def to_json(self) -> List[Dict]:
+        """Return the rows as the list of per-file dicts used in reports"""
+        return [
+            {
+                'file': file,
+                'encryption': encryption,
+                'obfuscation': obfuscation,
+                'evony_specific': evony_specific,
+                'as3_specific': as3_specific,
+                'context': context
+            }
+            for file, encryption, obfuscation, evony_specific, as3_specific, context in zip(
+                self.files, self.encryption, self.obfuscation,
+                self.evony_specific, self.as3_specific, self.contexts)
+        ]
+
+@dataclass
+class CriticalMatchTable:
+    """Critical vulnerability matches stored column-wise, one column per field
+    
+    Line numbers are kept in an int array and severities are derived from
+    the type, so each match costs a few appends instead of a dict. to_json()
+    builds the per-match dicts used in reports.
+    """
+    HIGH_SEVERITY_TYPES = frozenset({'key_exposure', 'weak_encryption'})
+    
+    types: List[str] = field(default_factory=list)
+    patterns: List[bytes] = field(default_factory=list)
+    contexts: List[str] = field(default_factory=list)
+    classes: List[str] = field(default_factory=list)
+    functions: List[str] = field(default_factory=list)
+    lines: array = field(default_factory=lambda: array('i'))
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def append(self, vuln_type: str, pattern: bytes, context: str,
+               class_name: str, func_name: str, line: int) -> None:
+        """Add a row for one match"""
+        self.types.append(vuln_type)
+        self.patterns.append(pattern)
+        self.contexts.append(context)
+        self.classes.append(class_name)
+        self.functions.append(func_name)
+        self.lines.append(line)
+
+    def to_json(self) -> List[Dict]:
+        """Return the rows as the list of per-match dicts used in reports"""
+        return [
+            {
+                'type': vuln_type,
+                'pattern': pattern,
+                'context': context,
+                'class': class_name,
+                'function': func_name,
+                'line': line,
+                'severity': 'HIGH' if vuln_type in self.HIGH_SEVERITY_TYPES else 'MEDIUM'
+            }
+            for vuln_type, pattern, context, class_name, func_name, line in zip(
+                self.types, self.patterns, self.contexts,
+                self.classes, self.functions, self.lines)
+        ]
+
+def _newline_offsets(content: bytes) -> array:
+    """Return the offsets of every newline in content, in order
+    
+    Line lookups then cost a bisect instead of a scan from the file start:
+    bisect_left(newlines, offset) is the 0-based line number of offset.
+    """
+    newlines = array('q')
+    pos = content.find(b'\n')
+    while pos != -1:
+        newlines.append(pos)
+        pos = content.find(b'\n', pos + 1)
+    return newlines
+
+def _line_span(newlines: array, length: int, start: int, end: int,
+               before: int = 0, after: int = 0) -> Tuple[int, int, int]:
+    """Return (1-based line number, start, end) of the lines holding content[start:end]
+    
+    The span is widened by up to before lines above and after lines below.
+    newlines comes from _newline_offsets(content) and length is len(content).
+    """
+    line = bisect_left(newlines, start)
+    first_line = max(0, line - before)
+    line_start = newlines[first_line - 1] + 1 if first_line else 0
+    end_line = min(len(newlines), bisect_left(newlines, end) + after)
+    line_end = newlines[end_line] if end_line < len(newlines) else length
+    return line + 1, line_start, line_end
+
+def _symbol_index(content: bytes, pattern: re.Pattern) -> Tuple[array, List[str]]:
+    """Return the start offsets and names of the declarations pattern finds
+    
+    pattern captures the declared name in group 1, like FUNCTION_NAME_PATTERN.
+    """
+    starts = array('q')
+    names = []
+    for match in pattern.finditer(content):
+        starts.append(match.start())
+        names.append(match.group(1).decode('utf-8', errors='ignore'))
+    return starts, names
+
+def _symbol_before(index: Tuple[array, List[str]], offset: int) -> str:
+    """Return the name of the last declaration in index starting before offset"""
+    starts, names = index
+    i = bisect_left(starts, offset)
+    return names[i - 1] if i else "unknown"
+
+# The whitespace bytes.strip() removes
+_ASCII_WHITESPACE = ' \t\n\r\x0b\x0c'
+
+def _decode_context(content: bytes, start: int, end: int) -> str:
+    """Return content[start:end] decoded as UTF-8, without surrounding whitespace
+    
+    Stripping the decoded text instead of the bytes saves a copy per match.
+    """
+    return content[start:end].decode('utf-8', errors='ignore').strip(_ASCII_WHITESPACE)
+
+def _decode_cached(contexts: Dict[Tuple[int, int], str], content: bytes,
+                   start: int, end: int) -> str:
+    """Return _decode_context(content, start, end), decoding each span once
+    
+    Matches on the same lines share a context window, so contexts maps
+    (start, end) spans to their decoded text for the duration of one scan.
+    """
+    key = (start, end)
+    context = contexts.get(key)
+    if context is None:
+        context = contexts[key] = _decode_context(content, start, end)
+    return context
+
+def _context_at(content: bytes, newlines: array, start: int, end: int,
+                contexts: Dict[Tuple[int, int], str]) -> Tuple[int, str]:
+    """Return the 1-based line number and stripped source lines of a match"""
+    line, line_start, line_end = _line_span(newlines, len(content), start, end)
+    return line, _decode_cached(contexts, content, line_start, line_end)
+
+def _pattern_db_path(expressions: List[bytes], flags: int) -> str:
+    """Return the cache file for a Hyperscan database of expressions
+    
+    The name hashes the expressions, flags and Hyperscan version, so a
+    changed pattern table or library never loads a stale database.
+    """
+    key = hashlib.sha256(b'\0'.join(expressions))
+    key.update(f"\0{flags}\0{getattr(hyperscan, '__version__', '')}".encode())
+    return os.path.join(PATTERN_CACHE_DIR, f"hs_{key.hexdigest()}.db")
+
+def _load_pattern_db(path: str, count: int) -> Optional[Tuple[List[int], object]]:
+    """Load a database saved by _save_pattern_db
+    
+    Returns (indices of the compiled expressions, database), or None if
+    there is no usable cache file. count is the number of expressions.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        header = array('I')
+        header.frombytes(data[:header.itemsize])
+        end = header.itemsize * (header[0] + 1)
+        header.frombytes(data[header.itemsize:end])
+        indices = header.tolist()[1:]
+        if not indices or max(indices) >= count:
+            return None
+        # Databases are compiled in block mode, which loadb must be told
+        db = hyperscan.loadb(data[end:], hyperscan.HS_MODE_BLOCK)
+        db.scratch = hyperscan.Scratch(db)
+        return indices, db
+    except (OSError, ValueError, IndexError, TypeError, hyperscan.error):
+        return None
+
+def _save_pattern_db(path: str, indices: List[int], db) -> None:
+    """Write db and the indices of its expressions to path, best effort"""
+    header = array('I', [len(indices)] + indices)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write under a temporary name so concurrent runs never read a
+        # partial file
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(header.tobytes())
+            f.write(hyperscan.dumpb(db))
+        os.replace(temp_path, path)
+    except (OSError, hyperscan.error):
+        pass
+
+_REGEX_METACHARS = frozenset(b'.^$*+?{}[]|()')
+
+def _literal_of(pattern: bytes) -> Optional[bytes]:
+    """Return the text a pattern matches literally, or None for a real regex"""
+    literal = bytearray()
+    escaped = False
+    for char in pattern:
+        if escaped:
+            # \d, \w, \x00 etc. are classes or escapes, not literal text
+            if chr(char).isalnum():
+                return None
+            literal.append(char)
+            escaped = False
+        elif char == ord('\\'):
+            escaped = True
+        elif char in _REGEX_METACHARS:
+            return None
+        else:
+            literal.append(char)
+    if escaped or not literal:
+        return None
+    return bytes(literal)
+
+def _has_top_level_alternation(pattern: bytes) -> bool:
+    """Return whether pattern has a | outside any group or character class"""
+    depth = 0
+    in_class = False
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == ord('\\'):
+            escaped = True
+        elif in_class:
+            in_class = char != ord(']')
+        elif char == ord('['):
+            in_class = True
+        elif char == ord('('):
+            depth += 1
+        elif char == ord(')'):
+            depth -= 1
+        elif char == ord('|') and depth == 0:
+            return True
+    return False
+
+def _required_literal(pattern: bytes) -> Optional[bytes]:
+    """Return the literal text every match of pattern starts with, or None
+    
+    This is the run of plain characters before the first regex construct,
+    less its last character if that is quantified as optional.
+    """
+    if _has_top_level_alternation(pattern):
+        return None
+    literal = bytearray()
+    escaped = False
+    stop = None
+    for char in pattern:
+        if escaped:
+            if chr(char).isalnum():
+                stop = char
+                break
+            literal.append(char)
+            escaped = False
+        elif char == ord('\\'):
+            escaped = True
+        elif char in _REGEX_METACHARS:
+            stop = char
+            break
+        else:
+            literal.append(char)
+    if stop is not None and stop in b'?*{':
+        del literal[-1:]
+    return bytes(literal) or None
+
+def _fold_case(pattern: bytes) -> Optional[bytes]:
+    """Return pattern rewritten to match lowercased text case-sensitively, or None
+    
+    Letters outside escapes are lowercased, in character classes too, and
+    escapes such as \\s or \\w are kept. Patterns with \\x escapes, which
+    may stand for an uppercase letter, or inline (?flags) are not folded.
+    """
+    folded = bytearray()
+    escaped = False
+    for i, char in enumerate(pattern):
+        if escaped:
+            if char == ord('x'):
+                return None
+            folded.append(char)
+            escaped = False
+        elif char == ord('\\'):
+            folded.append(char)
+            escaped = True
+        elif char == ord('?') and pattern[i - 1:i] == b'(' and pattern[i + 1:i + 2].isalpha():
+            return None
+        else:
+            folded.append(char)
+            if ord('A') <= char <= ord('Z'):
+                folded[-1] = char + 32
+    return bytes(folded)
+
+def _lowercase(content) -> bytes:
+    """Return a lowercased copy of content, as bytes or an mmap
+    
+    re's IGNORECASE is ASCII-only for bytes, as is bytes.lower(), and the
+    copy has the same length, so match offsets carry over to content.
+    Caseless matchers find the same matches in the copy as in content.
+    """
+    return content[:].lower()
+
+# Encryption patterns
+ENCRYPTION_PATTERNS = _compile_patterns({
+    'aes': [
+        rb'AES(?:\.|\[)["\'](?:encrypt|decrypt)["\']',
+        rb'Rijndael',
+        rb'CryptoJS\.AES',
+        rb'\x00\x01\x02\x03\x04\x05\x06\x07',
+        rb'(?:\x10{16}|\x20{16})',
+        rb'SecurityManager\.encrypt',
+        rb'EncryptionManager',
+        rb'CryptoHelper'
+    ],
+    'rc4': [
+        rb'RC4(?:\.|\[)["\'](?:encrypt|decrypt)["\']',
+        rb'ArcFour',
+        rb'rc4_encrypt',
+        SboxPattern(),
+        rb'StreamCipher',
+        rb'ByteStreamEncryption'
+    ],
+    'des': [
+        rb'DES(?:\.|\[)["\'](?:encrypt|decrypt)["\']',
+        rb'TripleDES',
+        rb'3DES',
+        rb'BlockCipher'
+    ],
+    'xor': [
+        re.compile(rb'(.)\1{2,}', re.DOTALL),  # Byte runs
+        rb'XOR',
+        rb'\^=',
+        rb'ByteXOR'
+    ],
+    'base64': [
+        rb'(?:[A-Za-z0-9+/]{4}){4,}(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?',
+        rb'btoa\(',
+        rb'atob\(',
+        rb'Base64\.encode',
+        rb'Base64\.decode'
+    ]
+})
+
+# Obfuscation patterns
+OBFUSCATION_PATTERNS = _compile_patterns({
+    'junk_code': [
+        rb'if\s*\(\s*false\s*\)',
+        rb'while\s*\(\s*false\s*\)',
+        rb'function\s*\w+\s*\(\)\s*{\s*return\s*\w+\s*;\s*}',
+        rb'void\s+0;',
+        rb'undefined;'
+    ],
+    'control_flow': [
+        rb'switch\s*\(\s*\w+\s*\)\s*{\s*case\s+0x[0-9a-f]+:',
+        rb'if\s*\(\s*\w+\s*===\s*0x[0-9a-f]+\s*\)',
+        rb'goto\s+case\s+\d+',
+        rb'default:\s*\{\s*\w+\s*=\s*\d+;\s*\}'
+    ],
+    'string_encryption': [
+        rb'String\.fromCharCode\([^)]+\)',
+        rb'\[[^\]]+\]\.join\([\'"][\'"]?\)',
+        rb'\\u[0-9a-fA-F]{4}',
+        rb'charCodeAt\(\d+\)\s*\^\s*\d+',
+        rb'split\([\'"][\'"]?\)\.reverse\(\)'
+    ],
+    'dynamic_eval': [
+        rb'eval\s*\(',
+        rb'Function\s*\([^)]*\)',
+        rb'setTimeout\s*\(\s*[\'"][^\'"]+[\'"]\s*,',
+        rb'new\s+Function\s*\('
+    ],
+    'property_obfuscation': [
+        rb'\[\s*[\'"](?:\\x[0-9a-fA-F]{2})+[\'"]\s*\]',
+        rb'\w+\[\s*[\'"][\w$]+[\'"]\s*\]\s*=',
+        rb'Object\.defineProperty\s*\(',
+        rb'__defineGetter__'
+    ]
+})
+
+# Evony-specific patterns
+EVONY_PATTERNS = _compile_patterns({
+    'network': [
+        rb'Socket(?:Connection|Manager|Event)',
+        rb'NetManager',
+        rb'HttpRequest',
+        rb'AMFService'
+    ],
+    'game_logic': [
+        rb'GameManager',
+        rb'BattleManager',
+        rb'ResourceManager',
+        rb'PlayerManager'
+    ],
+    'ui': [
+        rb'UIComponent',
+        rb'PopUpManager',
+        rb'MainView',
+        rb'Dialog'
+    ]
+})
+
+# ActionScript-specific patterns
+ACTIONSCRIPT_PATTERNS = _compile_patterns({
+    'network': [
+        rb'URLLoader',
+        rb'URLRequest',
+        rb'Socket\.',
+        rb'XMLSocket',
+        rb'NetConnection',
+        rb'SharedObject'
+    ],
+    'binary': [
+        rb'ByteArray',
+        rb'readBytes',
+        rb'writeBytes',
+        rb'readObject',
+        rb'writeObject'
+    ],
+    'security': [
+        rb'Security\.',
+        rb'allowDomain',
+        rb'loadPolicyFile',
+        rb'LocalConnection'
+    ]
+})
+
 class EvonyMasterAnalyzer:
+    # Password hashing patterns
+    PASSWORD_PATTERNS = _compile_patterns([
+        rb'SHA1\.hash\([^)]+\)\s*\+\s*[\'"]=[\'"].*?MD5\.hash',  # Combined SHA1+MD5
+        rb'MD5\.hash\((\w+)\.password\)',  # Direct password hashing
+    ])
+
+    # Token generation patterns
+    TOKEN_PATTERNS = _compile_patterns([
+        rb'MD5\.hash\(MD5\.hash\([^)]+\)\s*\+\s*[\'"]IUGI_md5_key_',  # Double MD5 with static salt
+        rb'MD5\.hash\([^)]+\)\s*\+\s*[\'"][^\'"]+_key_',  # MD5 with static salt
+    ])
+
+    # Action verification patterns
+    ACTION_PATTERNS = _compile_patterns([
+        rb'MD5\.hash\([\'"](?:PlayEvony|Celebrate|EarnPrestige)[\'"].*?TAO_',  # Game action verification
+        rb'MD5\.hash\(.*?Context\.getInstance\(\)\.(?:userName|getPlayerBean)',  # Context-based verification
+    ])
+
+    # API signing patterns
+    API_PATTERNS = _compile_patterns([
+        rb'MD5\.hash\([^)]+9f758e2deccbe6244f734371b9642eda',  # Hardcoded API key
+        rb'[\'"][a-f0-9]{32}[\'"]',  # Potential hardcoded MD5 hashes
+    ])
+    
+    # Known vulnerable patterns
+    VULNERABILITY_PATTERNS = _compile_patterns({
+        'hardcoded_keys': [
+            rb'(?:key|iv|salt)\s*=\s*["\'][0-9a-fA-F]{16,}["\']',
+            rb'0x[0-9a-fA-F]{16,}',
+            rb'["\'][A-Za-z0-9+/]{22,}["\']'  # Base64 encoded keys
+        ],
+        'weak_key_generation': [
+            rb'Math\.random\(',
+            rb'new\s+Date\(\)',
+            rb'getTime\(\)',
+            rb'toString\(\).substring'
+        ],
+        'static_iv': [
+            rb'(?:iv|salt)\s*=\s*new\s+ByteArray',
+            rb'writeBytes\([^,]+,\s*0,\s*16\)'
+        ],
+        'ecb_mode': [
+            rb'ECB',
+            rb'Cipher\.getInstance\([^)]*ECB[^)]*\)',
+            rb'(?:encrypt|decrypt)(?:Block|Blocks)'
+        ],
+        'padding_oracle': [
+            rb'catch\s*\([^)]+\)\s*{\s*return\s*(?:false|null)',
+            rb'catch\s*\([^)]+\)\s*{\s*throw',
+            rb'PKCS5Padding|PKCS7Padding'
+        ]
+    })
+
+    # Implementation patterns
+    IMPLEMENTATION_PATTERNS = _compile_patterns({
+        'key_derivation': [
+            rb'(?:derive|generate)Key',
+            rb'PBKDF2',
+            rb'hash(?:Password|Key)',
+            rb'MD5|SHA(?:-?\d+)?'
+        ],
+        'encryption_mode': [
+            rb'CBC|CFB|OFB|CTR|GCM',
+            rb'Cipher\.getInstance',
+            rb'CryptoStream'
+        ],
+        'initialization': [
+            rb'initWith(?:Key|IV)',
+            rb'createEncryptor',
+            rb'cipher\.init'
+        ]
+    })
+    
+    # Critical vulnerability patterns
+    CRITICAL_PATTERNS = _compile_patterns({
+        'key_exposure': [
+            rb'SharedObject\.getLocal\([^)]+\).*?\.data\[[\'"](key|iv|salt)[\'"]',
+            rb'trace\([^)]*(?:key|iv|salt)[^)]*\)',
+            rb'\.text\s*=\s*[^;]*(?:key|iv|salt)',
+            rb'URLVariables.*?key=',
+            rb'ExternalInterface\.call.*?key'
+        ],
+        'predictable_values': [
+            rb'(?:key|iv|salt)\s*=\s*(?:Math\.random|new Date|getTime)\(',
+            rb'\.getUTCMilliseconds\(\)',
+            rb'\.toString\(\)\.substr',
+            rb'Math\.floor\(Math\.random\(\)\s*\*'
+        ],
+        'unsafe_transmission': [
+            rb'send\([^)]*(?:key|iv|salt)[^)]*\)',
+            rb'URLRequest\([^)]*key[^)]*\)',
+            rb'Socket\.write.*?key',
+            rb'navigateToURL.*?key='
+        ],
+        'weak_encryption': [
+            rb'XORCipher',
+            rb'(?:key|data)\s*\^=',
+            rb'simple(?:Encrypt|Decrypt)',
+            rb'\.reverse\(\)'
+        ]
+    })
+
+    # Lowercase text every CRITICAL_PATTERNS pattern of a group needs one of;
+    # groups whose anchors are all absent from a file are skipped
+    CRITICAL_ANCHORS = {
+        'key_exposure': (b'key', b'iv', b'salt'),
+        'predictable_values': (b'math.random(', b'new date(', b'gettime(',
+                               b'.getutcmilliseconds()', b'.tostring().substr'),
+        'unsafe_transmission': (b'send(', b'urlrequest(', b'socket.write', b'navigatetourl'),
+        'weak_encryption': (b'xorcipher', b'^=', b'simpleencrypt', b'simpledecrypt',
+                            b'.reverse()')
+    }
+
+    # Crypto operation patterns
+    CRYPTO_PATTERNS = _compile_patterns({
+        'key_generation': [
+            rb'function\s+(?:create|generate|derive)Key',
+            rb'ByteArray\.(?:readBytes|writeBytes)\([^,]+,\s*0,\s*(?:16|24|32)\)',
+            rb'MD5\.hash',
+            rb'SHA\d*\.hash'
+        ],
+        'encryption_flow': [
+            rb'encrypt\s*\([^{]+{([^}]+)}',
+            rb'cipher\s*\.[^;]+;',
+            rb'Crypto\.(?:encrypt|decrypt)',
+            rb'CryptoStream'
+        ],
+        'data_handling': [
+            rb'readBytes\([^)]+\)',
+            rb'writeBytes\([^)]+\)',
+            rb'position\s*=\s*0',
+            rb'ByteArray\.length'
+        ]
+    })
+
+    # analyze_encryption_component result key for each CRYPTO_PATTERNS category
+    CRYPTO_RESULT_KEYS = {
+        'key_generation': 'key_handling',
+        'encryption_flow': 'crypto_operations',
+        'data_handling': 'data_flow'
+    }
+
     def __init__(self, swf_path: str):
         """Initialize Evony SWF Master Analyzer."""
         self.swf_path = swf_path
@@ -36,192 +710,439 @@ class EvonyMasterAnalyzer:
         self.as3_sorcerer_path = "C:/Program Files (x86)/AS3 Sorcerer/as3sorcerer.jar"
         self.tools_path = os.path.join(os.path.dirname(swf_path), "tools")
         
-        # Encryption patterns
-        self.encryption_patterns = {
-            'aes': [
-                rb'AES(?:\.|\[)["\'](?:encrypt|decrypt)["\']',
-                rb'Rijndael',
-                rb'CryptoJS\.AES',
-                rb'\x00\x01\x02\x03\x04\x05\x06\x07',
-                rb'(?:\x10{16}|\x20{16})',
-                rb'SecurityManager\.encrypt',
-                rb'EncryptionManager',
-                rb'CryptoHelper'
-            ],
-            'rc4': [
-                rb'RC4(?:\.|\[)["\'](?:encrypt|decrypt)["\']',
-                rb'ArcFour',
-                rb'rc4_encrypt',
-                rb'[\x00-\xFF]{256}',
-                rb'StreamCipher',
-                rb'ByteStreamEncryption'
-            ],
-            'des': [
-                rb'DES(?:\.|\[)["\'](?:encrypt|decrypt)["\']',
-                rb'TripleDES',
-                rb'3DES',
-                rb'BlockCipher'
-            ],
-            'xor': [
-                rb'(?:[\x00-\xFF])\1{2,}',
-                rb'XOR',
-                rb'\^=',
-                rb'ByteXOR'
-            ],
-            'base64': [
-                rb'[A-Za-z0-9+/]{4}*(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?',
-                rb'btoa\(',
-                rb'atob\(',
-                rb'Base64\.encode',
-                rb'Base64\.decode'
-            ]
-        }
+        self._init_patterns()
+
+    @classmethod
+    def pattern_matcher(cls) -> 'EvonyMasterAnalyzer':
+        """Return an analyzer with only its pattern tables set up
         
-        # Obfuscation patterns
-        self.obfuscation_patterns = {
-            'junk_code': [
-                rb'if\s*\(\s*false\s*\)',
-                rb'while\s*\(\s*false\s*\)',
-                rb'function\s*\w+\s*\(\)\s*{\s*return\s*\w+\s*;\s*}',
-                rb'void\s+0;',
-                rb'undefined;'
-            ],
-            'control_flow': [
-                rb'switch\s*\(\s*\w+\s*\)\s*{\s*case\s+0x[0-9a-f]+:',
-                rb'if\s*\(\s*\w+\s*===\s*0x[0-9a-f]+\s*\)',
-                rb'goto\s+case\s+\d+',
-                rb'default:\s*\{\s*\w+\s*=\s*\d+;\s*\}'
-            ],
-            'string_encryption': [
-                rb'String\.fromCharCode\([^)]+\)',
-                rb'\[[^\]]+\]\.join\([\'"][\'"]?\)',
-                rb'\\u[0-9a-fA-F]{4}',
-                rb'charCodeAt\(\d+\)\s*\^\s*\d+',
-                rb'split\([\'"][\'"]?\)\.reverse\(\)'
-            ],
-            'dynamic_eval': [
-                rb'eval\s*\(',
-                rb'Function\s*\([^)]*\)',
-                rb'setTimeout\s*\(\s*[\'"][^\'"]+[\'"]\s*,',
-                rb'new\s+Function\s*\('
-            ],
-            'property_obfuscation': [
-                rb'\[\s*[\'"](?:\\x[0-9a-fA-F]{2})+[\'"]\s*\]',
-                rb'\w+\[\s*[\'"][\w$]+[\'"]\s*\]\s*=',
-                rb'Object\.defineProperty\s*\(',
-                rb'__defineGetter__'
-            ]
-        }
+        Used by worker processes, which need the matchers but no SWF,
+        output directory or log files.
+        """
+        analyzer = cls.__new__(cls)
+        analyzer.logger = logging.getLogger(__name__)
+        analyzer._init_patterns()
+        return analyzer
 
-        # Evony-specific patterns
-        self.evony_patterns = {
-            'network': [
-                rb'Socket(?:Connection|Manager|Event)',
-                rb'NetManager',
-                rb'HttpRequest',
-                rb'AMFService'
-            ],
-            'game_logic': [
-                rb'GameManager',
-                rb'BattleManager',
-                rb'ResourceManager',
-                rb'PlayerManager'
-            ],
-            'ui': [
-                rb'UIComponent',
-                rb'PopUpManager',
-                rb'MainView',
-                rb'Dialog'
-            ]
-        }
+    def _init_patterns(self):
+        """Set up the detection pattern tables and their matchers"""
+        self._bind_tables()
+        # The matchers only depend on the tables, so every instance of a
+        # class shares the ones built for its first instance
+        (self._pattern_ids, self._pattern_db, self._pattern_set,
+         self._required_literals, self._literal_patterns,
+         self._folded_patterns, self._literal_texts) = self._shared_matchers()
+
+    def _bind_tables(self):
+        """Bind the detection pattern tables"""
+        # The tables are compiled once at import and shared read-only
+        self.encryption_patterns = ENCRYPTION_PATTERNS
+        self.obfuscation_patterns = OBFUSCATION_PATTERNS
+        self.evony_patterns = EVONY_PATTERNS
+        self.actionscript_patterns = ACTIONSCRIPT_PATTERNS
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _shared_matchers(cls) -> Tuple:
+        """Build the pattern matchers for cls once per process
+        
+        Returns (pattern ids, Hyperscan database, RE2 set, required
+        literals, literal patterns, case-folded patterns, literal texts) for
+        _init_patterns.
+        """
+        builder = cls.__new__(cls)
+        builder._bind_tables()
+        builder._pattern_ids = {}
+        pattern_db = builder._build_pattern_db()
+        # Without Hyperscan, scan_patterns falls back to an RE2 set, and
+        # without RE2 to substring searches for the literal text that
+        # patterns start with
+        pattern_set = builder._build_pattern_set() if pattern_db is None else None
+        if pattern_db is None and pattern_set is None:
+            required_literals = builder._find_required_literals()
+        else:
+            required_literals = []
+        folded_patterns = builder._fold_patterns()
+        # Folded patterns that are plain text are searched for with bytes.find
+        literal_texts = {}
+        for pattern, folded in folded_patterns.items():
+            literal = _literal_of(folded.pattern)
+            if literal is not None:
+                literal_texts[pattern] = literal
+        return (builder._pattern_ids, pattern_db, pattern_set,
+                required_literals, builder._find_literal_patterns(),
+                folded_patterns, literal_texts)
+
+    def _iter_prefilterable(self) -> Iterator[re.Pattern]:
+        """Yield the patterns of every table that scan_patterns may prefilter
+        
+        These are the detection tables and the crypto analysis tables. Only
+        plain regexes compiled with the shared flags are yielded, each once.
+        """
+        tables = (self.encryption_patterns, self.obfuscation_patterns,
+                  self.evony_patterns, self.actionscript_patterns,
+                  self.VULNERABILITY_PATTERNS, self.IMPLEMENTATION_PATTERNS,
+                  self.CRITICAL_PATTERNS, self.CRYPTO_PATTERNS,
+                  {'password_hashing': self.PASSWORD_PATTERNS,
+                   'token_generation': self.TOKEN_PATTERNS,
+                   'action_verification': self.ACTION_PATTERNS,
+                   'api_signing': self.API_PATTERNS})
+        seen = set()
+        for pattern_dict in tables:
+            for patterns in pattern_dict.values():
+                for pattern in patterns:
+                    if not isinstance(pattern, re.Pattern) or pattern.flags != PATTERN_FLAGS:
+                        continue
+                    if pattern not in seen:
+                        seen.add(pattern)
+                        yield pattern
+
+    def _build_pattern_db(self):
+        """Compile every prefilterable pattern into one Hyperscan database
+        
+        The database only reports which patterns occur in a file, so one
+        scan covers pattern detection and crypto analysis; counts and match
+        offsets are still taken with re for those patterns. Patterns
+        Hyperscan cannot compile (e.g. backreferences) get no id and are
+        always run with re.
+        
+        The compiled database is saved under PATTERN_CACHE_DIR and loaded
+        from there by later runs with the same patterns.
+        """
+        if hyperscan is None:
+            return None
+            
+        flags = hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_SINGLEMATCH
+        patterns = list(self._iter_prefilterable())
+        cache_path = _pattern_db_path([pattern.pattern for pattern in patterns], flags)
+        cached = _load_pattern_db(cache_path, len(patterns))
+        if cached is not None:
+            indices, db = cached
+            for index in indices:
+                self._pattern_ids[patterns[index]] = len(self._pattern_ids)
+            return db
+            
+        indices = []
+        for index, pattern in enumerate(patterns):
+            try:
+                hyperscan.Database().compile(expressions=[pattern.pattern], flags=[flags])
+            except hyperscan.error:
+                continue
+            self._pattern_ids[pattern] = len(self._pattern_ids)
+            indices.append(index)
+            
+        if not self._pattern_ids:
+            return None
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[pattern.pattern for pattern in self._pattern_ids],
+            ids=list(self._pattern_ids.values()),
+            elements=len(self._pattern_ids),
+            flags=[flags] * len(self._pattern_ids)
+        )
+        _save_pattern_db(cache_path, indices, db)
+        return db
+
+    def _build_pattern_set(self):
+        """Compile every prefilterable pattern into one RE2 set
+        
+        Like the Hyperscan database, the set only reports which patterns
+        occur in a file, in a single linear-time pass. Patterns RE2 does not
+        support (e.g. backreferences) get no id and are always run with re.
+        """
+        if re2 is None:
+            return None
+            
+        options = re2.Options()
+        options.case_sensitive = False
+        # Match bytes as bytes, like re does for bytes patterns
+        options.encoding = re2.Options.Encoding.LATIN1
+        options.log_errors = False
+        pattern_set = re2.Set.SearchSet(options)
+        for pattern in self._iter_prefilterable():
+            try:
+                self._pattern_ids[pattern] = pattern_set.Add(b'(?m)' + pattern.pattern)
+            except re2.error:
+                continue
+                
+        if not self._pattern_ids:
+            return None
+        pattern_set.Compile()
+        return pattern_set
+
+    def _find_required_literals(self) -> List[Tuple[int, bytes]]:
+        """Give an id to each pattern that starts with literal text
+        
+        Returns (pattern id, lowercased literal) pairs. All prefilterable
+        patterns use the shared case-insensitive flags, so scan_patterns can
+        search a lowercased copy of the content.
+        """
+        required_literals = []
+        for pattern in self._iter_prefilterable():
+            literal = _required_literal(pattern.pattern)
+            if literal is None:
+                continue
+            self._pattern_ids[pattern] = len(self._pattern_ids)
+            required_literals.append((self._pattern_ids[pattern], literal.lower()))
+        return required_literals
+
+    def _fold_patterns(self) -> Dict[re.Pattern, re.Pattern]:
+        """Map each foldable pattern to a case-sensitive twin for lowercased text
+        
+        Running the twin over _lowercase(content) finds the same matches as
+        the case-insensitive pattern over content, but lets re use its fast
+        literal searches.
+        """
+        folded_patterns = {}
+        for pattern in self._iter_prefilterable():
+            folded = _fold_case(pattern.pattern)
+            if folded is not None:
+                folded_patterns[pattern] = re.compile(folded, PATTERN_FLAGS & ~re.IGNORECASE)
+        return folded_patterns
+
+    def _find_spans(self, pattern, content, lowered: bytes) -> Iterator[Tuple[int, int]]:
+        """Yield the (start, end) spans of the matches of pattern in content
+        
+        lowered is _lowercase(content). Patterns that are plain text are
+        found with bytes.find on it, and patterns with a case-folded twin
+        run the twin over it; the rest run over content.
+        """
+        literal = self._literal_texts.get(pattern)
+        if literal is not None:
+            # Non-overlapping, like finditer
+            pos = lowered.find(literal)
+            while pos != -1:
+                yield pos, pos + len(literal)
+                pos = lowered.find(literal, pos + len(literal))
+            return
+        folded = self._folded_patterns.get(pattern)
+        if folded is None:
+            matches = pattern.finditer(content)
+        else:
+            matches = folded.finditer(lowered)
+        for match in matches:
+            yield match.span()
+
+    def _first_span(self, pattern, content, lowered: bytes) -> Optional[Tuple[int, int]]:
+        """Return the span of the first match of pattern in content, or None"""
+        return next(self._find_spans(pattern, content, lowered), None)
+
+    def _ruled_out(self, pattern, matched: Optional[Set[int]]) -> bool:
+        """Return whether the scan_patterns result matched shows pattern is absent"""
+        if matched is None:
+            return False
+        pattern_id = self._pattern_ids.get(pattern)
+        return pattern_id is not None and pattern_id not in matched
+
+    def _find_literal_patterns(self) -> Set[re.Pattern]:
+        """Return the detection patterns that match plain literal text
+        
+        Matches of these patterns mark the lines reported as context.
+        """
+        literal_patterns = set()
+        for pattern_dict in (self.encryption_patterns, self.obfuscation_patterns,
+                             self.evony_patterns, self.actionscript_patterns):
+            for patterns in pattern_dict.values():
+                for pattern in patterns:
+                    if isinstance(pattern, re.Pattern) and _literal_of(pattern.pattern):
+                        literal_patterns.add(pattern)
+        return literal_patterns
+
+    def _iter_as_files(self, directory: str) -> Iterator[str]:
+        """Recursively yield the paths of .as files under directory"""
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self._iter_as_files(entry.path)
+                elif entry.name.endswith('.as'):
+                    yield entry.path
+
+    def extract_context(self, content, spans: List[Tuple[int, int]], radius: int = 5) -> str:
+        """Return the lines within radius lines of any of the given match spans
+        
+        content may be bytes or an mmap. Overlapping windows are merged into
+        runs of lines, and each run is sliced out and decoded in one piece.
+        """
+        newlines = _newline_offsets(content)
+        last_line = len(newlines)
+        runs = []
+        for line in sorted({bisect_left(newlines, start) for start, _ in spans}):
+            if runs and line - radius <= runs[-1][1] + 1:
+                runs[-1][1] = min(last_line, line + radius)
+            else:
+                runs.append([max(0, line - radius), min(last_line, line + radius)])
+                
+        blocks = []
+        for first, last in runs:
+            run_start = newlines[first - 1] + 1 if first else 0
+            run_end = newlines[last] if last < last_line else len(content)
+            text = content[run_start:run_end].decode('utf-8', errors='ignore')
+            blocks.append('\n'.join(line.rstrip('\r') for line in text.split('\n')))
+        return '\n'.join(blocks)
+
+    def scan_patterns(self, content: bytes, lowered: Optional[bytes] = None) -> Optional[Set[int]]:
+        """Return the ids of the prefiltered patterns that may occur in content
+        
+        With Hyperscan or an RE2 set these are the patterns it found.
+        Otherwise they are the patterns whose leading literal occurs in
+        content. Either way the search runs over lowered (_lowercase(content)),
+        computed if not given.
+        Returns None if no pattern can be prefiltered.
+        """
+        if self._pattern_db is None and self._pattern_set is None and not self._required_literals:
+            return None
+        # Both scanners are caseless and only take bytes, so they scan the
+        # lowercased copy rather than making another copy of an mmap
+        if lowered is None:
+            lowered = _lowercase(content)
+        if self._pattern_set is not None:
+            return set(self._pattern_set.Match(lowered) or ())
+        if self._pattern_db is None:
+            return {pattern_id for pattern_id, literal in self._required_literals if literal in lowered}
+        matched = set()
+        
+        def on_match(pattern_id, start, end, flags, context):
+            matched.add(pattern_id)
+            
+        self._pattern_db.scan(lowered, match_event_handler=on_match)
+        return matched
 
     def setup_logging(self):
-        """Configure detailed logging"""
-        log_file = os.path.join(self.output_dir, 'analysis.log')
-        logging.basicConfig(
-            level=logging.DEBUG,
-            format='%(asctime)s - %(levelname)s - [%(funcName)s] - %(message)s',
-            handlers=[
+        """Configure detailed logging
+        
+        Log calls only put records on a queue; a QueueListener thread does
+        the formatting and the file and console writes.
+        """
+        root = logging.getLogger()
+        if not root.handlers:
+            log_file = os.path.join(self.output_dir, 'analysis.log')
+            formatter = logging.Formatter('%(asctime)s - %(levelname)s - [%(funcName)s] - %(message)s')
+            handlers = [
                 logging.FileHandler(log_file),
                 logging.StreamHandler()
             ]
-        )
+            for handler in handlers:
+                handler.setFormatter(formatter)
+                
+            log_queue = queue.Queue(-1)
+            listener = QueueListener(log_queue, *handlers)
+            listener.start()
+            # Flush whatever is still queued when the interpreter exits
+            atexit.register(listener.stop)
+            root.setLevel(logging.DEBUG)
+            root.addHandler(QueueHandler(log_queue))
         self.logger = logging.getLogger(__name__)
 
     def verify_swf(self) -> Tuple[bool, str]:
         """Verify SWF file integrity and type"""
         try:
             with open(self.swf_path, 'rb') as f:
-                header = f.read(3)
-                if header not in [b'CWS', b'FWS', b'ZWS']:
+                header = f.read(8)
+                if header[:3] not in [b'CWS', b'FWS', b'ZWS']:
                     return False, "Invalid SWF signature"
                     
-                f.seek(0)
-                data = f.read()
+                reported_size = struct.unpack_from('<I', header, 4)[0] if len(header) == 8 else 0
                 
-                # For compressed SWF (CWS), decompress the data
-                if header == b'CWS':
+                # For compressed SWF (CWS), stream the decompressed body
+                # straight to disk instead of holding both copies in memory
+                if header[:3] == b'CWS':
+                    decompressed_path = os.path.join(self.output_dir, "decompressed.swf")
+                    decompressor = zlib.decompressobj()
+                    actual_size = len(header)
                     try:
-                        decompressed = zlib.decompress(data[8:])
-                        full_data = data[:8] + decompressed
-                        # Save decompressed version for analysis
-                        decompressed_path = os.path.join(self.output_dir, "decompressed.swf")
                         with open(decompressed_path, 'wb') as df:
-                            df.write(b'FWS' + full_data[3:])
-                        self.swf_path = decompressed_path
-                        data = full_data
+                            df.write(b'FWS' + header[3:])
+                            while chunk := f.read(1 << 20):
+                                block = decompressor.decompress(chunk)
+                                df.write(block)
+                                actual_size += len(block)
+                            block = decompressor.flush()
+                            df.write(block)
+                            actual_size += len(block)
+                        if not decompressor.eof:
+                            raise zlib.error("incomplete or truncated stream")
                     except zlib.error as e:
+                        os.remove(decompressed_path)
                         return False, f"Error decompressing SWF: {str(e)}"
+                    # Save decompressed version for analysis
+                    self.swf_path = decompressed_path
+                else:
+                    actual_size = os.fstat(f.fileno()).st_size
                 
                 # Check file size consistency with some tolerance for compression
-                reported_size = int.from_bytes(data[4:8], byteorder='little')
-                actual_size = len(data)
                 if not (0.5 <= actual_size / reported_size <= 2.0):
                     return False, f"File size mismatch: reported={reported_size}, actual={actual_size}"
                     
-                return True, header.decode()
+                return True, header[:3].decode()
         except Exception as e:
             return False, f"Error verifying SWF: {str(e)}"
 
-    def detect_patterns(self, content: bytes, pattern_dict: Dict[str, List[bytes]]) -> Dict[str, float]:
-        """Detect patterns in content and return confidence scores"""
+    def detect_patterns(self, content: bytes, pattern_dict: Dict[str, Tuple[re.Pattern, ...]],
+                        matched: Optional[Set[int]] = None,
+                        spans: Optional[List[Tuple[int, int]]] = None,
+                        lowered: Optional[bytes] = None) -> Dict[str, float]:
+        """Detect patterns in content and return confidence scores
+        
+        matched is the result of scan_patterns(content); patterns it rules
+        out are skipped without running re. If spans is given, the match
+        spans of literal patterns are appended to it in the same pass, for
+        extract_context. lowered is _lowercase(content), computed if not
+        given.
+        """
+        if lowered is None:
+            lowered = _lowercase(content)
         results = {}
         for category, patterns in pattern_dict.items():
             total_matches = 0
             pattern_matches = 0
             for pattern in patterns:
+                if self._ruled_out(pattern, matched):
+                    continue
                 try:
-                    matches = len(re.findall(pattern, content, re.IGNORECASE | re.MULTILINE))
+                    if spans is not None and pattern in self._literal_patterns:
+                        matches = 0
+                        for span in self._find_spans(pattern, content, lowered):
+                            spans.append(span)
+                            matches += 1
+                    else:
+                        # Counts past the frequency cap cannot change the score
+                        matches = sum(1 for _ in islice(self._find_spans(pattern, content, lowered), FREQUENCY_CAP))
                     if matches > 0:
                         pattern_matches += 1
                     total_matches += matches
                 except Exception as e:
-                    self.logger.error(f"Error matching pattern {pattern}: {e}")
+                    self.logger.error(f"Error matching pattern {pattern.pattern}: {e}")
             
             # Calculate confidence based on both pattern variety and frequency
             if pattern_matches > 0:
                 variety_score = pattern_matches / len(patterns)
-                frequency_score = min(1.0, total_matches / 10)  # Cap at 10 matches
+                frequency_score = min(1.0, total_matches / FREQUENCY_CAP)
                 confidence = (variety_score + frequency_score) / 2
                 if confidence > 0.1:  # Only report if confidence is significant
                     results[category] = confidence
         
         return results
 
+    def start_as3sorcerer(self) -> subprocess.Popen:
+        """Start AS3 Sorcerer decompiling into as3sorcerer_out and return the process"""
+        output_dir = os.path.join(self.output_dir, "as3sorcerer_out")
+        os.makedirs(output_dir, exist_ok=True)
+        
+        return subprocess.Popen([
+            "java", "-jar", self.as3_sorcerer_path,
+            "-source", self.swf_path,
+            "-out", output_dir,
+            "-advanced",  # Enable advanced deobfuscation
+            "-pcode",    # Include bytecode analysis
+            "-debug"     # Include debug information
+        ])
+
     def decompile_with_as3sorcerer(self) -> bool:
         """Decompile using AS3 Sorcerer with advanced options"""
         try:
-            output_dir = os.path.join(self.output_dir, "as3sorcerer_out")
-            os.makedirs(output_dir, exist_ok=True)
-            
-            subprocess.run([
-                "java", "-jar", self.as3_sorcerer_path,
-                "-source", self.swf_path,
-                "-out", output_dir,
-                "-advanced",  # Enable advanced deobfuscation
-                "-pcode",    # Include bytecode analysis
-                "-debug"     # Include debug information
-            ], check=True)
+            process = self.start_as3sorcerer()
+            if process.wait() != 0:
+                raise subprocess.CalledProcessError(process.returncode, process.args)
             
             self.logger.info("Successfully decompiled with AS3 Sorcerer")
             return True
@@ -230,175 +1151,200 @@ class EvonyMasterAnalyzer:
             return False
 
     def parse_decompiled_code(self, content: bytes) -> List[Dict]:
-        """Parse decompiled ActionScript code into individual files"""
+        """Parse decompiled ActionScript code into individual files
+        
+        Files are separated by //---- header lines. Each section is named by
+        its first // comment line (skipping www. and Decompiled banners) and
+        its content is the source after that line, sliced out of content in
+        one piece.
+        """
         files = []
-        current_file = None
-        current_content = []
         
-        # Split content into lines for processing
-        lines = content.split(b'\n')
-        for line in lines:
-            try:
-                line = line.strip()
-                if not line:
+        # Section boundaries: start of content, each header line, end of content
+        bounds = [0]
+        for header in FILE_HEADER_PATTERN.finditer(content):
+            bounds.extend(header.span())
+        bounds.append(len(content))
+        
+        for start, end in zip(bounds[::2], bounds[1::2]):
+            file_name = None
+            for comment in COMMENT_LINE_PATTERN.finditer(content, start, end):
+                try:
+                    name = comment.group(1).strip().decode('utf-8')
+                except UnicodeDecodeError:
                     continue
+                if name and not name.startswith('www.') and not name.startswith('Decompiled'):
+                    file_name = name
+                    body_start = comment.end()
+                    break
+                    
+            if file_name is None:
+                continue
+            body = content[body_start:end].strip()
+            if body:
+                files.append({
+                    'name': file_name,
+                    'content': body
+                })
                 
-                # Check for file header
-                if line.startswith(b'//------------------------------------------------------------'):
-                    # Save previous file if exists
-                    if current_file and current_content:
-                        files.append({
-                            'name': current_file,
-                            'content': b'\n'.join(current_content)
-                        })
-                    current_content = []
-                    current_file = None
-                elif line.startswith(b'//') and not current_file:
-                    # Try to extract file name
-                    try:
-                        file_name = line[2:].strip().decode('utf-8')
-                        if file_name and not file_name.startswith('www.') and not file_name.startswith('Decompiled'):
-                            current_file = file_name
-                    except:
-                        pass
-                else:
-                    current_content.append(line)
-            except Exception as e:
-                self.logger.error(f"Error parsing line: {e}")
-                
-        # Add last file
-        if current_file and current_content:
-            files.append({
-                'name': current_file,
-                'content': b'\n'.join(current_content)
-            })
-            
         return files
 
-    def analyze_decompiled_code(self) -> Dict:
-        """Analyze decompiled ActionScript code"""
+    def analyze_source_file(self, file_path: str) -> Dict:
+        """Run pattern detection and crypto analysis on one decompiled file"""
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return self._analyze_source(b'')
+            # Map the file instead of reading it; the scans run over one
+            # lowercased copy, and only matched lines are decoded
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                return self._analyze_source(content)
+
+    def _analyze_source(self, content) -> Dict:
+        """Analyze the contents of a decompiled file, as bytes or an mmap"""
+        # Case-insensitive patterns run case-sensitively over one lowercased copy
+        lowered = _lowercase(content)
+        # One Hyperscan pass finds the patterns present in the file, for both
+        # pattern detection and crypto analysis
+        matched = self.scan_patterns(content, lowered)
+        # Literal matches found during detection mark the context lines
+        spans = []
+        
+        result = {
+            'encryption': self.detect_patterns(content, self.encryption_patterns, matched, spans, lowered),
+            'obfuscation': self.detect_patterns(content, self.obfuscation_patterns, matched, spans, lowered),
+            'evony_specific': self.detect_patterns(content, self.evony_patterns, matched, spans, lowered),
+            'as3_specific': self.detect_patterns(content, self.actionscript_patterns, matched, spans, lowered),
+            'context': None,
+            'crypto': self.analyze_crypto_implementation(content, matched, lowered)
+        }
+        
+        # Extract function context if any patterns were found
+        if result['encryption'] or result['obfuscation'] or \
+           result['evony_specific'] or result['as3_specific']:
+            result['context'] = self.extract_context(content, spans)
+            
+        return result
+
+    def analyze_decompiled_code(self, decompiler: Optional[subprocess.Popen] = None) -> Dict:
+        """Analyze decompiled ActionScript code
+        
+        If decompiler is a running start_as3sorcerer() process, files are
+        analyzed as it writes them instead of after it has finished.
+        """
         results = {
             'encryption': {},
             'obfuscation': {},
             'evony_specific': {},
-            'suspicious_functions': [],
+            'suspicious_functions': SuspiciousTable(),
             'crypto_implementation': None  # New field for crypto analysis
         }
         
         as3_dir = os.path.join(self.output_dir, "as3sorcerer_out")
-        if not os.path.exists(as3_dir):
+        if decompiler is None and not os.path.exists(as3_dir):
             return results
             
-        # Additional ActionScript-specific patterns
-        actionscript_patterns = {
-            'network': [
-                rb'URLLoader',
-                rb'URLRequest',
-                rb'Socket\.',
-                rb'XMLSocket',
-                rb'NetConnection',
-                rb'SharedObject'
-            ],
-            'binary': [
-                rb'ByteArray',
-                rb'readBytes',
-                rb'writeBytes',
-                rb'readObject',
-                rb'writeObject'
-            ],
-            'security': [
-                rb'Security\.',
-                rb'allowDomain',
-                rb'loadPolicyFile',
-                rb'LocalConnection'
-            ]
-        }
-            
-        for root, _, files in os.walk(as3_dir):
-            for file in files:
-                if file.endswith('.as'):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'rb') as f:
-                            content = f.read()
-                            
-                        # Detect encryption methods
-                        enc_results = self.detect_patterns(content, self.encryption_patterns)
-                        for method, confidence in enc_results.items():
-                            if method not in results['encryption']:
-                                results['encryption'][method] = confidence
-                            else:
-                                results['encryption'][method] = max(results['encryption'][method], confidence)
-                        
-                        # Detect obfuscation techniques
-                        obf_results = self.detect_patterns(content, self.obfuscation_patterns)
-                        for technique, confidence in obf_results.items():
-                            if technique not in results['obfuscation']:
-                                results['obfuscation'][technique] = confidence
-                            else:
-                                results['obfuscation'][technique] = max(results['obfuscation'][technique], confidence)
-                        
-                        # Detect Evony-specific patterns
-                        evony_results = self.detect_patterns(content, self.evony_patterns)
-                        for category, confidence in evony_results.items():
-                            if category not in results['evony_specific']:
-                                results['evony_specific'][category] = confidence
-                            else:
-                                results['evony_specific'][category] = max(results['evony_specific'][category], confidence)
-                        
-                        # Detect ActionScript-specific patterns
-                        as3_results = self.detect_patterns(content, actionscript_patterns)
-                        for category, confidence in as3_results.items():
-                            key = f'as3_{category}'
-                            if key not in results['evony_specific']:
-                                results['evony_specific'][key] = confidence
-                            else:
-                                results['evony_specific'][key] = max(results['evony_specific'][key], confidence)
+        crypto_results = {}
+        
+        # Files are independent, so they are analyzed across processes; each
+        # worker builds its pattern matchers once in _init_worker
+        workers = os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            if decompiler is None:
+                file_paths = list(self._iter_as_files(as3_dir))
+                chunksize = max(1, min(16, len(file_paths) // (workers * 4)))
+                analyzed = zip(file_paths, executor.map(_analyze_one, file_paths, chunksize=chunksize))
+            else:
+                analyzed = self._analyze_while_decompiling(executor, decompiler, as3_dir)
+                
+            for file_path, file_result in analyzed:
+                if 'error' in file_result:
+                    self.logger.error(f"Error analyzing file {file_path}: {file_result['error']}")
+                    continue
+                    
+                # Keep the highest confidence seen for each category
+                for section, prefix, target in (('encryption', '', 'encryption'),
+                                                ('obfuscation', '', 'obfuscation'),
+                                                ('evony_specific', '', 'evony_specific'),
+                                                ('as3_specific', 'as3_', 'evony_specific')):
+                    for category, confidence in file_result[section].items():
+                        key = prefix + category
+                        results[target][key] = max(results[target].get(key, 0.0), confidence)
                         
-                        # Record suspicious functions if any patterns were found
-                        if any(enc_results.values()) or any(obf_results.values()) or \
-                           any(evony_results.values()) or any(as3_results.values()):
-                            try:
-                                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                    code_content = f.read()
-                                
-                                # Extract function context
-                                suspicious_lines = []
-                                lines = code_content.split('\n')
-                                for i, line in enumerate(lines):
-                                    if any(pattern.encode() in line.encode() for patterns in 
-                                          [self.encryption_patterns.values(), 
-                                           self.obfuscation_patterns.values(), 
-                                           self.evony_patterns.values(),
-                                           actionscript_patterns.values()] 
-                                          for pattern in patterns):
-                                        context_start = max(0, i - 5)
-                                        context_end = min(len(lines), i + 6)
-                                        suspicious_lines.extend(lines[context_start:context_end])
-                                
-                                results['suspicious_functions'].append({
-                                    'file': os.path.relpath(file_path, as3_dir),
-                                    'encryption': enc_results,
-                                    'obfuscation': obf_results,
-                                    'evony_specific': evony_results,
-                                    'as3_specific': as3_results,
-                                    'context': '\n'.join(suspicious_lines)
-                                })
-                            except Exception as e:
-                                self.logger.error(f"Error extracting context from {file_path}: {e}")
+                # Record suspicious functions if any patterns were found
+                if file_result['context'] is not None:
+                    results['suspicious_functions'].append(
+                        os.path.relpath(file_path, as3_dir), file_result)
                     
-                    except Exception as e:
-                        self.logger.error(f"Error analyzing file {file_path}: {e}")
-        
+                for section, findings in file_result['crypto'].items():
+                    crypto_results.setdefault(section, []).extend(findings)
+
         # Add crypto implementation analysis
-        crypto_results = self.analyze_crypto_implementation(content)
         if any(crypto_results.values()):
             results['crypto_implementation'] = crypto_results
         
         return results
 
-    def analyze_crypto_implementation(self, content: bytes) -> Dict:
-        """Analyze cryptographic implementation details"""
+    def _analyze_while_decompiling(self, executor: ProcessPoolExecutor, decompiler: subprocess.Popen,
+                                   as3_dir: str) -> Iterator[Tuple[str, Dict]]:
+        """Submit .as files to executor as the decompiler writes them
+        
+        The output directory is polled while the decompiler runs. A file is
+        submitted once its size and mtime are unchanged between two polls;
+        whatever is left is submitted after the decompiler exits. Files that
+        changed after being submitted are submitted again at that point.
+        Yields (path, result) in submission order.
+        """
+        futures = []
+        submitted = {}  # path -> (signature when submitted, index in futures)
+        last_seen = {}
+        while True:
+            running = decompiler.poll() is None
+            if os.path.isdir(as3_dir):
+                for file_path in self._iter_as_files(as3_dir):
+                    if file_path in submitted:
+                        continue
+                    try:
+                        stat = os.stat(file_path)
+                    except OSError:
+                        continue
+                    signature = (stat.st_size, stat.st_mtime_ns)
+                    if running and last_seen.get(file_path) != signature:
+                        # Possibly still being written; check again next poll
+                        last_seen[file_path] = signature
+                        continue
+                    submitted[file_path] = (signature, len(futures))
+                    futures.append((file_path, executor.submit(_analyze_one, file_path)))
+            if not running:
+                break
+            time.sleep(DECOMPILE_POLL_INTERVAL)
+            
+        # A pause in the decompiler's writes can make a partly written file
+        # look finished, so anything that changed since is analyzed again
+        for file_path, (signature, index) in submitted.items():
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != signature:
+                futures[index][1].cancel()
+                futures[index] = (file_path, executor.submit(_analyze_one, file_path))
+            
+        if decompiler.returncode != 0:
+            self.logger.error(f"AS3 Sorcerer exited with status {decompiler.returncode}")
+        else:
+            self.logger.info("Successfully decompiled with AS3 Sorcerer")
+            
+        for file_path, future in futures:
+            yield file_path, future.result()
+
+    def analyze_crypto_implementation(self, content: bytes, matched: Optional[Set[int]] = None,
+                                      lowered: Optional[bytes] = None) -> Dict:
+        """Analyze cryptographic implementation details
+        
+        matched is the result of scan_patterns(content); patterns it rules
+        out are skipped. lowered is _lowercase(content), computed if not
+        given.
+        """
         results = {
             'password_hashing': [],
             'token_generation': [],
@@ -408,131 +1354,98 @@ class EvonyMasterAnalyzer:
         }
         
         try:
-            # Password hashing patterns
-            password_patterns = [
-                rb'SHA1\.hash\([^)]+\)\s*\+\s*[\'"]=[\'"].*?MD5\.hash',  # Combined SHA1+MD5
-                rb'MD5\.hash\((\w+)\.password\)',  # Direct password hashing
-            ]
-            
-            # Token generation patterns
-            token_patterns = [
-                rb'MD5\.hash\(MD5\.hash\([^)]+\)\s*\+\s*[\'"]IUGI_md5_key_',  # Double MD5 with static salt
-                rb'MD5\.hash\([^)]+\)\s*\+\s*[\'"][^\'"]+_key_',  # MD5 with static salt
-            ]
-            
-            # Action verification patterns
-            action_patterns = [
-                rb'MD5\.hash\([\'"](?:PlayEvony|Celebrate|EarnPrestige)[\'"].*?TAO_',  # Game action verification
-                rb'MD5\.hash\(.*?Context\.getInstance\(\)\.(?:userName|getPlayerBean)',  # Context-based verification
-            ]
-            
-            # API signing patterns
-            api_patterns = [
-                rb'MD5\.hash\([^)]+9f758e2deccbe6244f734371b9642eda',  # Hardcoded API key
-                rb'[\'"][a-f0-9]{32}[\'"]',  # Potential hardcoded MD5 hashes
-            ]
+            newlines = _newline_offsets(content)
+            contexts = {}
+            if lowered is None:
+                lowered = _lowercase(content)
             
             # Check password hashing
-            for pattern in password_patterns:
-                matches = list(re.finditer(pattern, content, re.IGNORECASE | re.MULTILINE))
-                if matches:
-                    for match in matches:
-                        context_start = max(0, content.rfind(b'\n', 0, match.start()) + 1)
-                        context_end = content.find(b'\n', match.end())
-                        if context_end == -1:
-                            context_end = len(content)
-                        
-                        # Get broader context
-                        broader_start = content.rfind(b'function', 0, context_start)
-                        if broader_start != -1:
-                            context_start = broader_start
-                        
-                        context = content[context_start:context_end].strip()
-                        results['password_hashing'].append({
-                            'pattern': pattern,
-                            'context': context.decode('utf-8', errors='ignore'),
-                            'line': content.count(b'\n', 0, match.start()) + 1,
-                            'vulnerability': 'HIGH - Weak password hashing using MD5/SHA1 concatenation'
-                        })
-                        results['vulnerabilities'].append({
-                            'type': 'weak_password_hashing',
-                            'severity': 'HIGH',
-                            'description': 'Password hashing uses weak algorithms (MD5/SHA1) and unsafe concatenation',
-                            'context': context.decode('utf-8', errors='ignore'),
-                            'line': content.count(b'\n', 0, match.start()) + 1
-                        })
+            for pattern in self.PASSWORD_PATTERNS:
+                if self._ruled_out(pattern, matched):
+                    continue
+                for start, end in self._find_spans(pattern, content, lowered):
+                    line, context_start, context_end = _line_span(
+                        newlines, len(content), start, end)
+                    
+                    # Get broader context
+                    broader_start = content.rfind(b'function', 0, context_start)
+                    if broader_start != -1:
+                        context_start = broader_start
+                    
+                    context = _decode_cached(contexts, content, context_start, context_end)
+                    results['password_hashing'].append({
+                        'pattern': pattern.pattern,
+                        'context': context,
+                        'line': line,
+                        'vulnerability': 'HIGH - Weak password hashing using MD5/SHA1 concatenation'
+                    })
+                    results['vulnerabilities'].append({
+                        'type': 'weak_password_hashing',
+                        'severity': 'HIGH',
+                        'description': 'Password hashing uses weak algorithms (MD5/SHA1) and unsafe concatenation',
+                        'context': context,
+                        'line': line
+                    })
             
             # Check token generation
-            for pattern in token_patterns:
-                matches = list(re.finditer(pattern, content, re.IGNORECASE | re.MULTILINE))
-                if matches:
-                    for match in matches:
-                        context_start = max(0, content.rfind(b'\n', 0, match.start()) + 1)
-                        context_end = content.find(b'\n', match.end())
-                        if context_end == -1:
-                            context_end = len(content)
-                        context = content[context_start:context_end].strip()
-                        results['token_generation'].append({
-                            'pattern': pattern,
-                            'context': context.decode('utf-8', errors='ignore'),
-                            'line': content.count(b'\n', 0, match.start()) + 1,
-                            'vulnerability': 'HIGH - Token generation uses static salt and weak hashing'
-                        })
-                        results['vulnerabilities'].append({
-                            'type': 'static_salt',
-                            'severity': 'HIGH',
-                            'description': 'Token generation uses hardcoded salt values',
-                            'context': context.decode('utf-8', errors='ignore'),
-                            'line': content.count(b'\n', 0, match.start()) + 1
-                        })
+            for pattern in self.TOKEN_PATTERNS:
+                if self._ruled_out(pattern, matched):
+                    continue
+                for start, end in self._find_spans(pattern, content, lowered):
+                    line, context = _context_at(content, newlines, start, end, contexts)
+                    results['token_generation'].append({
+                        'pattern': pattern.pattern,
+                        'context': context,
+                        'line': line,
+                        'vulnerability': 'HIGH - Token generation uses static salt and weak hashing'
+                    })
+                    results['vulnerabilities'].append({
+                        'type': 'static_salt',
+                        'severity': 'HIGH',
+                        'description': 'Token generation uses hardcoded salt values',
+                        'context': context,
+                        'line': line
+                    })
             
             # Check action verification
-            for pattern in action_patterns:
-                matches = list(re.finditer(pattern, content, re.IGNORECASE | re.MULTILINE))
-                if matches:
-                    for match in matches:
-                        context_start = max(0, content.rfind(b'\n', 0, match.start()) + 1)
-                        context_end = content.find(b'\n', match.end())
-                        if context_end == -1:
-                            context_end = len(content)
-                        context = content[context_start:context_end].strip()
-                        results['action_verification'].append({
-                            'pattern': pattern,
-                            'context': context.decode('utf-8', errors='ignore'),
-                            'line': content.count(b'\n', 0, match.start()) + 1,
-                            'vulnerability': 'MEDIUM - Action verification uses predictable values'
-                        })
-                        results['vulnerabilities'].append({
-                            'type': 'predictable_verification',
-                            'severity': 'MEDIUM',
-                            'description': 'Action verification uses predictable concatenation of values',
-                            'context': context.decode('utf-8', errors='ignore'),
-                            'line': content.count(b'\n', 0, match.start()) + 1
-                        })
+            for pattern in self.ACTION_PATTERNS:
+                if self._ruled_out(pattern, matched):
+                    continue
+                for start, end in self._find_spans(pattern, content, lowered):
+                    line, context = _context_at(content, newlines, start, end, contexts)
+                    results['action_verification'].append({
+                        'pattern': pattern.pattern,
+                        'context': context,
+                        'line': line,
+                        'vulnerability': 'MEDIUM - Action verification uses predictable values'
+                    })
+                    results['vulnerabilities'].append({
+                        'type': 'predictable_verification',
+                        'severity': 'MEDIUM',
+                        'description': 'Action verification uses predictable concatenation of values',
+                        'context': context,
+                        'line': line
+                    })
             
             # Check API signing
-            for pattern in api_patterns:
-                matches = list(re.finditer(pattern, content, re.IGNORECASE | re.MULTILINE))
-                if matches:
-                    for match in matches:
-                        context_start = max(0, content.rfind(b'\n', 0, match.start()) + 1)
-                        context_end = content.find(b'\n', match.end())
-                        if context_end == -1:
-                            context_end = len(content)
-                        context = content[context_start:context_end].strip()
-                        results['api_signing'].append({
-                            'pattern': pattern,
-                            'context': context.decode('utf-8', errors='ignore'),
-                            'line': content.count(b'\n', 0, match.start()) + 1,
-                            'vulnerability': 'CRITICAL - Hardcoded API key in client code'
-                        })
-                        results['vulnerabilities'].append({
-                            'type': 'hardcoded_api_key',
-                            'severity': 'CRITICAL',
-                            'description': 'API key is hardcoded in client code',
-                            'context': context.decode('utf-8', errors='ignore'),
-                            'line': content.count(b'\n', 0, match.start()) + 1
-                        })
+            for pattern in self.API_PATTERNS:
+                if self._ruled_out(pattern, matched):
+                    continue
+                for start, end in self._find_spans(pattern, content, lowered):
+                    line, context = _context_at(content, newlines, start, end, contexts)
+                    results['api_signing'].append({
+                        'pattern': pattern.pattern,
+                        'context': context,
+                        'line': line,
+                        'vulnerability': 'CRITICAL - Hardcoded API key in client code'
+                    })
+                    results['vulnerabilities'].append({
+                        'type': 'hardcoded_api_key',
+                        'severity': 'CRITICAL',
+                        'description': 'API key is hardcoded in client code',
+                        'context': context,
+                        'line': line
+                    })
         
         except Exception as e:
             self.logger.error(f"Error analyzing crypto implementation: {str(e)}")
@@ -540,79 +1453,41 @@ class EvonyMasterAnalyzer:
         
         return results
 
-    def analyze_encryption_implementation(self, content: bytes, file_path: str) -> Dict:
-        """Analyze encryption implementation for potential vulnerabilities"""
+    def analyze_encryption_implementation(self, content: bytes, file_path: str,
+                                          matched: Optional[Set[int]] = None,
+                                          lowered: Optional[bytes] = None) -> Dict:
+        """Analyze encryption implementation for potential vulnerabilities
+        
+        matched is the result of scan_patterns(content); patterns it rules
+        out are skipped. lowered is _lowercase(content), computed if not
+        given.
+        """
         vulnerabilities = []
         implementation_details = {}
         
-        # Known vulnerable patterns
-        vulnerability_patterns = {
-            'hardcoded_keys': [
-                rb'(?:key|iv|salt)\s*=\s*["\'][0-9a-fA-F]{16,}["\']',
-                rb'0x[0-9a-fA-F]{16,}',
-                rb'["\'][A-Za-z0-9+/]{22,}["\']'  # Base64 encoded keys
-            ],
-            'weak_key_generation': [
-                rb'Math\.random\(',
-                rb'new\s+Date\(\)',
-                rb'getTime\(\)',
-                rb'toString\(\).substring'
-            ],
-            'static_iv': [
-                rb'(?:iv|salt)\s*=\s*new\s+ByteArray',
-                rb'writeBytes\([^,]+,\s*0,\s*16\)'
-            ],
-            'ecb_mode': [
-                rb'ECB',
-                rb'Cipher\.getInstance\([^)]*ECB[^)]*\)',
-                rb'(?:encrypt|decrypt)(?:Block|Blocks)'
-            ],
-            'padding_oracle': [
-                rb'catch\s*\([^)]+\)\s*{\s*return\s*(?:false|null)',
-                rb'catch\s*\([^)]+\)\s*{\s*throw',
-                rb'PKCS5Padding|PKCS7Padding'
-            ]
-        }
+        newlines = _newline_offsets(content)
+        contexts = {}
+        if lowered is None:
+            lowered = _lowercase(content)
         
-        # Implementation patterns
-        implementation_patterns = {
-            'key_derivation': [
-                rb'(?:derive|generate)Key',
-                rb'PBKDF2',
-                rb'hash(?:Password|Key)',
-                rb'MD5|SHA(?:-?\d+)?'
-            ],
-            'encryption_mode': [
-                rb'CBC|CFB|OFB|CTR|GCM',
-                rb'Cipher\.getInstance',
-                rb'CryptoStream'
-            ],
-            'initialization': [
-                rb'initWith(?:Key|IV)',
-                rb'createEncryptor',
-                rb'cipher\.init'
-            ]
-        }
-        
-        # Check for vulnerabilities
-        for vuln_type, patterns in vulnerability_patterns.items():
+        # Check for vulnerabilities; presence and one example per pattern
+        # is enough, so stop at the first match
+        for vuln_type, patterns in self.VULNERABILITY_PATTERNS.items():
             matches = []
             for pattern in patterns:
+                if self._ruled_out(pattern, matched):
+                    continue
                 try:
-                    found = re.finditer(pattern, content, re.IGNORECASE | re.MULTILINE)
-                    for match in found:
-                        context_start = max(0, content.rfind(b'\n', 0, match.start()) + 1)
-                        context_end = content.find(b'\n', match.end())
-                        if context_end == -1:
-                            context_end = len(content)
-                        context = content[context_start:context_end].strip()
+                    span = self._first_span(pattern, content, lowered)
+                    if span:
+                        line, context = _context_at(content, newlines, *span, contexts)
                         matches.append({
-                            'pattern': pattern,
-                            'context': context.decode('utf-8', errors='ignore'),
-                            'line': content.count(b'\n', 0, match.start()) + 1
+                            'pattern': pattern.pattern,
+                            'context': context,
+                            'line': line
                         })
                 except Exception as e:
-                    self.logger.error(f"Error matching vulnerability pattern {pattern}: {e}")
+                    self.logger.error(f"Error matching vulnerability pattern {pattern.pattern}: {e}")
             
             if matches:
                 vulnerabilities.append({
@@ -622,24 +1497,22 @@ class EvonyMasterAnalyzer:
                 })
         
         # Analyze implementation details
-        for impl_type, patterns in implementation_patterns.items():
+        for impl_type, patterns in self.IMPLEMENTATION_PATTERNS.items():
             matches = []
             for pattern in patterns:
+                if self._ruled_out(pattern, matched):
+                    continue
                 try:
-                    found = re.finditer(pattern, content, re.IGNORECASE | re.MULTILINE)
-                    for match in found:
-                        context_start = max(0, content.rfind(b'\n', 0, match.start()) + 1)
-                        context_end = content.find(b'\n', match.end())
-                        if context_end == -1:
-                            context_end = len(content)
-                        context = content[context_start:context_end].strip()
+                    found = self._find_spans(pattern, content, lowered)
+                    for start, end in islice(found, MAX_IMPLEMENTATION_MATCHES):
+                        line, context = _context_at(content, newlines, start, end, contexts)
                         matches.append({
-                            'pattern': pattern,
-                            'context': context.decode('utf-8', errors='ignore'),
-                            'line': content.count(b'\n', 0, match.start()) + 1
+                            'pattern': pattern.pattern,
+                            'context': context,
+                            'line': line
                         })
                 except Exception as e:
-                    self.logger.error(f"Error matching implementation pattern {pattern}: {e}")
+                    self.logger.error(f"Error matching implementation pattern {pattern.pattern}: {e}")
             
             if matches:
                 implementation_details[impl_type] = matches
@@ -650,199 +1523,108 @@ class EvonyMasterAnalyzer:
             'implementation': implementation_details
         }
 
-    def analyze_encryption_component(self, content: bytes, file_path: str) -> Dict:
-        """Deep analysis of encryption component implementation"""
+    def analyze_encryption_component(self, content: bytes, file_path: str,
+                                     matched: Optional[Set[int]] = None) -> Dict:
+        """Deep analysis of encryption component implementation
+        
+        content may be bytes or an mmap. matched is the result of
+        scan_patterns(content) on the content as passed in, before line
+        endings are normalized; patterns it rules out are skipped.
+        """
         results = {
             'key_handling': [],
             'crypto_operations': [],
             'data_flow': [],
-            'critical_vulnerabilities': []
+            'critical_vulnerabilities': CriticalMatchTable()
         }
         
         try:
-            # Normalize line endings and decode content
-            content = content.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
-            
-            # Critical vulnerability patterns
-            critical_patterns = {
-                'key_exposure': [
-                    rb'SharedObject\.getLocal\([^)]+\).*?\.data\[[\'"](key|iv|salt)[\'"]',
-                    rb'trace\([^)]*(?:key|iv|salt)[^)]*\)',
-                    rb'\.text\s*=\s*[^;]*(?:key|iv|salt)',
-                    rb'URLVariables.*?key=',
-                    rb'ExternalInterface\.call.*?key'
-                ],
-                'predictable_values': [
-                    rb'(?:key|iv|salt)\s*=\s*(?:Math\.random|new Date|getTime)\(',
-                    rb'\.getUTCMilliseconds\(\)',
-                    rb'\.toString\(\)\.substr',
-                    rb'Math\.floor\(Math\.random\(\)\s*\*'
-                ],
-                'unsafe_transmission': [
-                    rb'send\([^)]*(?:key|iv|salt)[^)]*\)',
-                    rb'URLRequest\([^)]*key[^)]*\)',
-                    rb'Socket\.write.*?key',
-                    rb'navigateToURL.*?key='
-                ],
-                'weak_encryption': [
-                    rb'XORCipher',
-                    rb'(?:key|data)\s*\^=',
-                    rb'simple(?:Encrypt|Decrypt)',
-                    rb'\.reverse\(\)'
-                ]
-            }
-            
-            # Crypto operation patterns
-            crypto_patterns = {
-                'key_generation': [
-                    rb'function\s+(?:create|generate|derive)Key',
-                    rb'ByteArray\.(?:readBytes|writeBytes)\([^,]+,\s*0,\s*(?:16|24|32)\)',
-                    rb'MD5\.hash',
-                    rb'SHA\d*\.hash'
-                ],
-                'encryption_flow': [
-                    rb'encrypt\s*\([^{]+{([^}]+)}',
-                    rb'cipher\s*\.[^;]+;',
-                    rb'Crypto\.(?:encrypt|decrypt)',
-                    rb'CryptoStream'
-                ],
-                'data_handling': [
-                    rb'readBytes\([^)]+\)',
-                    rb'writeBytes\([^)]+\)',
-                    rb'position\s*=\s*0',
-                    rb'ByteArray\.length'
-                ]
-            }
+            # Normalize line endings; only content that has a \r is copied
+            if content.find(b'\r') != -1:
+                content = content[:].replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+            newlines = _newline_offsets(content)
+            lowered = _lowercase(content)
+            contexts = {}
+            # Declarations are indexed once so each match bisects for its
+            # enclosing function and class
+            functions = _symbol_index(content, FUNCTION_NAME_PATTERN)
+            classes = _symbol_index(content, CLASS_NAME_PATTERN)
             
             # Check for critical vulnerabilities
-            for vuln_type, patterns in critical_patterns.items():
+            for vuln_type, patterns in self.CRITICAL_PATTERNS.items():
+                if not any(anchor in lowered for anchor in self.CRITICAL_ANCHORS[vuln_type]):
+                    continue
                 for pattern in patterns:
+                    if self._ruled_out(pattern, matched):
+                        continue
                     try:
-                        matches = list(re.finditer(pattern, content, re.IGNORECASE | re.MULTILINE))
-                        if matches:
-                            for match in matches:
-                                # Get full line context
-                                line_start = content.rfind(b'\n', 0, match.start()) + 1
-                                line_end = content.find(b'\n', match.end())
-                                if line_end == -1:
-                                    line_end = len(content)
-                                
-                                # Get broader context (up to 3 lines before and after)
-                                context_start = content.rfind(b'\n', 0, line_start)
-                                for _ in range(2):
-                                    temp = content.rfind(b'\n', 0, context_start)
-                                    if temp == -1:
-                                        break
-                                    context_start = temp
-                                
-                                context_end = line_end
-                                for _ in range(3):
-                                    temp = content.find(b'\n', context_end + 1)
-                                    if temp == -1:
-                                        break
-                                    context_end = temp
-                                
-                                context = content[context_start:context_end].strip()
-                                
-                                # Extract function name and class name if possible
-                                func_name = "unknown"
-                                class_name = "unknown"
-                                
-                                # Look for function
-                                func_start = content.rfind(b'function', 0, match.start())
-                                if func_start != -1:
-                                    func_name_match = re.search(rb'function\s+(\w+)', content[func_start:match.start()])
-                                    if func_name_match:
-                                        func_name = func_name_match.group(1).decode('utf-8', errors='ignore')
-                                
-                                # Look for class
-                                class_start = content.rfind(b'class', 0, match.start())
-                                if class_start != -1:
-                                    class_name_match = re.search(rb'class\s+(\w+)', content[class_start:match.start()])
-                                    if class_name_match:
-                                        class_name = class_name_match.group(1).decode('utf-8', errors='ignore')
-                                
-                                results['critical_vulnerabilities'].append({
-                                    'type': vuln_type,
-                                    'pattern': pattern,
-                                    'context': context.decode('utf-8', errors='ignore'),
-                                    'class': class_name,
-                                    'function': func_name,
-                                    'line': content.count(b'\n', 0, match.start()) + 1,
-                                    'severity': 'HIGH' if vuln_type in ['key_exposure', 'weak_encryption'] else 'MEDIUM'
-                                })
+                        for line, context, class_name, func_name in self._component_matches(
+                                pattern, content, lowered, newlines, functions, classes, contexts):
+                            results['critical_vulnerabilities'].append(
+                                vuln_type, pattern.pattern, context, class_name, func_name, line)
                     except Exception as e:
-                        self.logger.error(f"Error matching critical pattern {pattern}: {str(e)}")
+                        self.logger.error(f"Error matching critical pattern {pattern.pattern}: {str(e)}")
             
-            # Analyze crypto operations (similar structure as above)
-            for op_type, patterns in crypto_patterns.items():
+            # Analyze crypto operations
+            for op_type, patterns in self.CRYPTO_PATTERNS.items():
+                findings = results[self.CRYPTO_RESULT_KEYS[op_type]]
                 for pattern in patterns:
+                    if self._ruled_out(pattern, matched):
+                        continue
                     try:
-                        matches = list(re.finditer(pattern, content, re.IGNORECASE | re.MULTILINE))
-                        if matches:
-                            for match in matches:
-                                # Similar context extraction as above
-                                line_start = content.rfind(b'\n', 0, match.start()) + 1
-                                line_end = content.find(b'\n', match.end())
-                                if line_end == -1:
-                                    line_end = len(content)
-                                
-                                context_start = content.rfind(b'\n', 0, line_start)
-                                for _ in range(2):
-                                    temp = content.rfind(b'\n', 0, context_start)
-                                    if temp == -1:
-                                        break
-                                    context_start = temp
-                                
-                                context_end = line_end
-                                for _ in range(3):
-                                    temp = content.find(b'\n', context_end + 1)
-                                    if temp == -1:
-                                        break
-                                    context_end = temp
-                                
-                                context = content[context_start:context_end].strip()
-                                
-                                # Extract function name and class name if possible
-                                func_name = "unknown"
-                                class_name = "unknown"
-                                
-                                # Look for function
-                                func_start = content.rfind(b'function', 0, match.start())
-                                if func_start != -1:
-                                    func_name_match = re.search(rb'function\s+(\w+)', content[func_start:match.start()])
-                                    if func_name_match:
-                                        func_name = func_name_match.group(1).decode('utf-8', errors='ignore')
-                                
-                                # Look for class
-                                class_start = content.rfind(b'class', 0, match.start())
-                                if class_start != -1:
-                                    class_name_match = re.search(rb'class\s+(\w+)', content[class_start:match.start()])
-                                    if class_name_match:
-                                        class_name = class_name_match.group(1).decode('utf-8', errors='ignore')
-                                
-                                results[op_type].append({
-                                    'pattern': pattern,
-                                    'context': context.decode('utf-8', errors='ignore'),
-                                    'class': class_name,
-                                    'function': func_name,
-                                    'line': content.count(b'\n', 0, match.start()) + 1
-                                })
+                        findings.extend(
+                            {
+                                'pattern': pattern.pattern,
+                                'context': context,
+                                'class': class_name,
+                                'function': func_name,
+                                'line': line
+                            }
+                            for line, context, class_name, func_name in self._component_matches(
+                                pattern, content, lowered, newlines, functions, classes, contexts)
+                        )
                     except Exception as e:
-                        self.logger.error(f"Error matching crypto pattern {pattern}: {str(e)}")
+                        self.logger.error(f"Error matching crypto pattern {pattern.pattern}: {str(e)}")
         
         except Exception as e:
             self.logger.error(f"Error analyzing encryption component in {file_path}: {str(e)}")
         
         return results
 
-    def analyze(self) -> AnalysisResult:
-        """Main analysis function"""
+    def _component_matches(self, pattern, content: bytes, lowered: bytes, newlines: array,
+                           functions: Tuple[array, List[str]],
+                           classes: Tuple[array, List[str]],
+                           contexts: Dict[Tuple[int, int], str]) -> Iterator[Tuple[int, str, str, str]]:
+        """Yield (line, context, class name, function name) for each match of pattern
+        
+        The context runs from 2 lines before the match to 3 lines after it.
+        functions and classes are _symbol_index() results for content and
+        contexts is the _decode_cached() cache shared across patterns.
+        """
+        for start, end in self._find_spans(pattern, content, lowered):
+            line, context_start, context_end = _line_span(
+                newlines, len(content), start, end, 2, 3)
+            yield (line, _decode_cached(contexts, content, context_start, context_end),
+                   _symbol_before(classes, start), _symbol_before(functions, start))
+
+    def analyze(self, decompile: bool = True) -> AnalysisResult:
+        """Main analysis function
+        
+        With decompile, AS3 Sorcerer is run on the SWF and its output is
+        analyzed while it is being written.
+        """
         self.logger.info(f"Starting analysis of {self.swf_path}")
         
+        decompiler = None
+        if decompile:
+            try:
+                decompiler = self.start_as3sorcerer()
+            except Exception as e:
+                self.logger.error(f"Error decompiling with AS3 Sorcerer: {e}")
+        
         # Initialize results
         patterns_found = []
-        analysis_results = self.analyze_decompiled_code()
+        analysis_results = self.analyze_decompiled_code(decompiler)
         
         # Format results
         try:
@@ -924,26 +1706,18 @@ class EvonyMasterAnalyzer:
                         patterns_found.append("-" * 40)
         
             # Write results to file
+            report = '\n'.join(patterns_found)
             output_file = os.path.join(self.output_dir, "analysis_results.txt")
             with open(output_file, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(patterns_found))
+                f.write(report)
             self.logger.info(f"Analysis results saved to {output_file}")
             
-            # Print to console with proper encoding
+            # Print to console as UTF-8 whatever the console encoding is
             print("\nANALYSIS RESULTS")
             print("=" * 80)
-            
-            # Process and print each line with proper encoding
-            for line in patterns_found:
-                try:
-                    # First try to encode as UTF-8
-                    encoded_line = line.encode('utf-8', errors='ignore')
-                    # Then decode back to string for printing
-                    decoded_line = encoded_line.decode('utf-8', errors='ignore')
-                    print(decoded_line)
-                except Exception as e:
-                    # If any error occurs, fall back to ASCII
-                    print(line.encode('ascii', errors='replace').decode())
+            sys.stdout.flush()
+            sys.stdout.buffer.write(report.encode('utf-8', errors='replace') + b'\n')
+            sys.stdout.buffer.flush()
             
             print("=" * 80)
             print(f"\nFull analysis results saved to: {output_file}")
@@ -959,14 +1733,32 @@ class EvonyMasterAnalyzer:
             patterns_found=patterns_found
         )
 
+@lru_cache(maxsize=1)
+def _get_pattern_matcher() -> EvonyMasterAnalyzer:
+    """Return the pattern matcher shared by every file in this process"""
+    return EvonyMasterAnalyzer.pattern_matcher()
+
+def _init_worker():
+    """Build the pattern matchers once per worker process"""
+    _get_pattern_matcher()
+
+def _analyze_one(file_path: str) -> Dict:
+    """Analyze one decompiled file in a worker process"""
+    try:
+        return _get_pattern_matcher().analyze_source_file(file_path)
+    except Exception as e:
+        return {'error': str(e)}
+
 def main():
     import argparse
     parser = argparse.ArgumentParser(description="Evony SWF Master Analyzer")
     parser.add_argument("swf_file", help="Path to the SWF file to analyze")
+    parser.add_argument("--no-decompile", action="store_true",
+                        help="Do not run AS3 Sorcerer before analyzing")
     args = parser.parse_args()
     
     analyzer = EvonyMasterAnalyzer(args.swf_file)
-    result = analyzer.analyze()
+    result = analyzer.analyze(decompile=not args.no_decompile)
     
     if result.success:
         print("\n=== Analysis Results ===")
@@ -7,30 +7,58 @@ import os
 import sys
 import json
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional
 import argparse
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from swf_decrypt_enhanced import SWFDecrypter
 from evony_abc_analyzer import EvonyABCAnalyzer
 from evony_full_decryptor import EvonyFullDecryptor
 
-def json_serializable(obj: Any) -> Any:
-    """Convert objects to JSON serializable format"""
+def _json_default(obj: Any) -> Any:
+    """Convert the values json/orjson cannot serialize on their own"""
     if isinstance(obj, (datetime, Path)):
         return str(obj)
-    elif isinstance(obj, bytes):
+    if isinstance(obj, bytes):
         return obj.hex()
-    elif isinstance(obj, dict):
-        return {k: json_serializable(v) for k, v in obj.items()}
-    elif isinstance(obj, (list, tuple)):
-        return [json_serializable(x) for x in obj]
-    return obj
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _dump_json(obj: Any) -> bytes:
+    """Serialize obj as indented UTF-8 JSON, with orjson when it is installed
+    
+    Unsupported values go through _json_default, so the results tree is
+    serialized in place instead of being copied first.
+    
+    orjson's output is not byte-identical to json's: non-ASCII text is
+    written as UTF-8 instead of \\u escapes, some floats are spelled
+    differently (0.00001 and 1e20 rather than 1e-05 and 1e+20), and NaN
+    and infinities become null, since they are not valid JSON. The
+    values read back the same apart from NaN and infinities.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_json_default,
+                                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                                | orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            pass
+    return json.dumps(obj, indent=2, default=_json_default).encode('utf-8')
 
 class EvonyMasterToolkit:
-    def __init__(self):
-        """Initialize the master toolkit."""
+    def __init__(self, output_dir: Optional[str] = None):
+        """Initialize the master toolkit.
+        
+        output_dir defaults to a new timestamped directory under
+        analysis_results.
+        """
         self.logger = logging.getLogger('evony_master_toolkit')
         self.logger.setLevel(logging.INFO)
         if not self.logger.handlers:
@@ -40,8 +68,8 @@ class EvonyMasterToolkit:
             self.logger.addHandler(handler)
         
         # Create output directories
-        self.output_dir = os.path.join("analysis_results", 
-                                     datetime.now().strftime('%Y%m%d_%H%M%S'))
+        self.output_dir = output_dir or os.path.join("analysis_results", 
+                                                     datetime.now().strftime('%Y%m%d_%H%M%S'))
         os.makedirs(self.output_dir, exist_ok=True)
         
         # Initialize components
@@ -51,9 +79,15 @@ class EvonyMasterToolkit:
         
         # Analysis results
         self.analysis_results = {}
+        
+        # radare2 session shared by every _analyze_binary call
+        self._r2 = None
     
-    def process_file(self, file_path: str) -> Dict[str, Any]:
-        """Process a file through the toolkit pipeline."""
+    def process_file(self, file_path: str, record: bool = True) -> Dict[str, Any]:
+        """Process a file through the toolkit pipeline.
+        
+        With record, the results are added to analysis_results and saved.
+        """
         try:
             self.logger.info(f"Processing file: {file_path}")
             
@@ -97,8 +131,9 @@ class EvonyMasterToolkit:
             }
             
             # Save results
-            self.analysis_results[file_path] = results
-            self._save_results()
+            if record:
+                self.analysis_results[file_path] = results
+                self._save_results()
             
             return results
             
@@ -109,55 +144,77 @@ class EvonyMasterToolkit:
     def _analyze_binary(self, file_path: str):
         """Perform low-level binary analysis using available tools."""
         try:
-            import r2pipe
-            
-            # Initialize radare2
-            r2 = r2pipe.open(file_path)
+            r2 = self._r2_session()
+            # Drop the previous file and its analysis, then load this one
+            r2.cmd('o-*;af-*;f-*')
+            r2.cmd(f'o "{file_path}"')
             r2.cmd('aaa')  # Analyze all
             
-            # Get function list
-            functions = r2.cmdj('aflj')
-            if functions:
-                # Save function analysis
-                output_file = os.path.join(
-                    self.output_dir,
-                    f"functions_{os.path.basename(file_path)}.json"
-                )
-                with open(output_file, 'w') as f:
-                    json.dump(functions, f, indent=2)
-                
-                self.logger.info(f"Found {len(functions)} functions")
+            # Save function, string and import lists
+            function_count = self._save_r2_json(r2, 'aflj', 'functions', file_path)
+            if function_count:
+                self.logger.info(f"Found {function_count} functions")
                 
-                # Get strings
-                strings = r2.cmdj('izj')
-                if strings:
-                    strings_file = os.path.join(
-                        self.output_dir,
-                        f"strings_{os.path.basename(file_path)}.json"
-                    )
-                    with open(strings_file, 'w') as f:
-                        json.dump(strings, f, indent=2)
-                    
-                    self.logger.info(f"Found {len(strings)} strings")
+                string_count = self._save_r2_json(r2, 'izj', 'strings', file_path)
+                if string_count:
+                    self.logger.info(f"Found {string_count} strings")
                 
-                # Get imports
-                imports = r2.cmdj('iij')
-                if imports:
-                    imports_file = os.path.join(
-                        self.output_dir,
-                        f"imports_{os.path.basename(file_path)}.json"
-                    )
-                    with open(imports_file, 'w') as f:
-                        json.dump(imports, f, indent=2)
-                    
-                    self.logger.info(f"Found {len(imports)} imports")
-            
-            r2.quit()
+                import_count = self._save_r2_json(r2, 'iij', 'imports', file_path)
+                if import_count:
+                    self.logger.info(f"Found {import_count} imports")
             
         except ImportError:
             self.logger.warning("r2pipe not available, skipping binary analysis")
         except Exception as e:
             self.logger.error(f"Error in binary analysis: {e}")
+            # Start the next file with a fresh radare2 process
+            self.close()
+    
+    def _r2_session(self):
+        """Return the radare2 session, starting it on first use
+        
+        One radare2 process is kept for the toolkit's lifetime instead of
+        spawning one per file; it starts on an empty buffer and each file is
+        opened into it.
+        """
+        if self._r2 is None:
+            import r2pipe
+            self._r2 = r2pipe.open('-')
+        return self._r2
+    
+    def close(self):
+        """Stop the radare2 session, if one was started"""
+        if self._r2 is not None:
+            try:
+                self._r2.quit()
+            except Exception as e:
+                self.logger.debug(f"Error stopping radare2: {e}")
+            self._r2 = None
+    
+    def _save_r2_json(self, r2, command: str, prefix: str, file_path: str) -> int:
+        """Write the JSON output of an r2 command to <prefix>_<file name>.json
+        
+        The output is written as r2 printed it instead of being parsed and
+        re-serialized; it is parsed only to count its entries. Returns that
+        count; nothing is written for empty or unparsable output.
+        """
+        raw = r2.cmd(command).strip()
+        if not raw:
+            return 0
+        try:
+            entries = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        except ValueError:
+            return 0
+        if not entries:
+            return 0
+            
+        output_file = os.path.join(
+            self.output_dir,
+            f"{prefix}_{os.path.basename(file_path)}.json"
+        )
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(raw)
+        return len(entries)
     
     def _save_results(self):
         """Save analysis results to file."""
@@ -167,17 +224,28 @@ class EvonyMasterToolkit:
                 f"results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
             )
             
-            # Convert results to JSON serializable format
-            results = json_serializable(self.analysis_results)
-            
-            with open(results_file, 'w') as f:
-                json.dump(results, f, indent=2)
+            with open(results_file, 'wb') as f:
+                f.write(_dump_json(self.analysis_results))
             
             self.logger.info(f"Results saved to {results_file}")
             
         except Exception as e:
             self.logger.error(f"Error saving results: {e}")
 
+_worker_toolkit: Optional[EvonyMasterToolkit] = None
+
+def _init_worker(output_dir: str):
+    """Create the toolkit used by this worker process"""
+    global _worker_toolkit
+    _worker_toolkit = EvonyMasterToolkit(output_dir)
+    # Stop the worker's radare2 session when the worker exits. Forked
+    # workers skip atexit handlers, but multiprocessing runs its finalizers
+    Finalize(_worker_toolkit, _worker_toolkit.close, exitpriority=10)
+
+def _process_one(file_path: str) -> Dict[str, Any]:
+    """Process one file in a worker process, leaving saving to the parent"""
+    return _worker_toolkit.process_file(file_path, record=False)
+
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(description='Evony Master Toolkit')
@@ -191,20 +259,33 @@ def main():
     try:
         if os.path.isfile(args.path):
             result = toolkit.process_file(args.path)
-            print(json.dumps(result, indent=2))
+            print(_dump_json(result).decode('utf-8'))
         elif os.path.isdir(args.path):
             if args.watch:
                 print("Directory watching not implemented yet")
             else:
-                for root, _, files in os.walk(args.path):
-                    for file in files:
-                        if file.endswith('.swf'):
-                            file_path = os.path.join(root, file)
-                            toolkit.process_file(file_path)
+                file_paths = [
+                    os.path.join(root, file)
+                    for root, _, files in os.walk(args.path)
+                    for file in files
+                    if file.endswith('.swf')
+                ]
+                # Files are independent, so they are processed across
+                # processes, each with its own toolkit writing into the
+                # same output directory; results are saved once at the end
+                with ProcessPoolExecutor(initializer=_init_worker,
+                                         initargs=(toolkit.output_dir,)) as executor:
+                    for file_path, result in zip(file_paths, executor.map(_process_one, file_paths)):
+                        if 'error' not in result:
+                            toolkit.analysis_results[file_path] = result
+                if toolkit.analysis_results:
+                    toolkit._save_results()
         else:
             print(f"Path not found: {args.path}")
     except KeyboardInterrupt:
         print("\nInterrupted by user")
+    finally:
+        toolkit.close()
 
 if __name__ == '__main__':
     main()
@@ -1,4 +1,6 @@
+import os
 import re
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 import tiktoken
@@ -6,31 +8,66 @@ from pygments import highlight
 from pygments.lexers import get_lexer_by_name, guess_lexer
 from pygments.formatters import HtmlFormatter
 from pygments.token import Token
+from pygments.util import ClassNotFound
 import autopep8
 
+# Model whose tokenizer chunk sizes are measured with
+TOKEN_MODEL = "gpt-4"
+# Lines tokenized per encode_batch call in CodeChatManager.process_code
+TOKEN_BATCH_SIZE = 4096
+
+@lru_cache(maxsize=None)
+def token_encoding(model: str = TOKEN_MODEL):
+    """Get the tiktoken encoding for a model, loaded once per process"""
+    return tiktoken.encoding_for_model(model)
+
+@lru_cache(maxsize=256)
+def format_python(code: str) -> str:
+    """Format Python code with autopep8, once per text"""
+    return autopep8.fix_code(code, options={'aggressive': 1})
+
+@lru_cache(maxsize=64)
+def lexer_for_language(language: str):
+    """Get the Pygments lexer for a language name, or None if there is none"""
+    try:
+        return get_lexer_by_name(language)
+    except ClassNotFound:
+        return None
+
+@lru_cache(maxsize=256)
+def guessed_lexer(code: str):
+    """Get the lexer guess_lexer picks for code, guessing once per text"""
+    return guess_lexer(code)
+
 class CodeChunk:
-    def __init__(self, code: str, start_line: int, language: str = "python"):
+    def __init__(self, code: str, start_line: int, language: str = "python",
+                 format_now: bool = False):
         self.code = code
         self.start_line = start_line
         self.language = language
         self.token_count = 0
         self.formatted_code = ""
+        # Python chunks are formatted when first rendered, or right away
+        # with format_now
+        self.needs_format = language == "python"
         self.process_code()
+        if format_now:
+            self.format()
     
     def process_code(self):
-        """Format and process the code chunk"""
-        if self.language == "python":
-            # Auto-format Python code
-            self.formatted_code = autopep8.fix_code(
-                self.code,
-                options={'aggressive': 1}
-            )
-        else:
-            self.formatted_code = self.code
+        """Process the code chunk, leaving formatting to format()"""
+        self.formatted_code = self.code
         
         # Count tokens
-        enc = tiktoken.encoding_for_model("gpt-4")
-        self.token_count = len(enc.encode(self.formatted_code))
+        self.token_count = len(token_encoding().encode(self.formatted_code))
+    
+    def format(self):
+        """Auto-format Python code if not done yet and recount its tokens"""
+        if not self.needs_format:
+            return
+        self.formatted_code = format_python(self.code)
+        self.token_count = len(token_encoding().encode(self.formatted_code))
+        self.needs_format = False
 
 class CodeChatManager:
     def __init__(self, max_chunk_size: int = 1000):
@@ -51,12 +88,27 @@ class CodeChatManager:
         current_line = 0
         chunk_start = 0
         
+        # Token count of every line, plus one for its newline; tokens merging
+        # across lines only make a joined chunk shorter than the sum.
+        # tiktoken encodes each batch across threads, and only the counts
+        # are kept
+        enc = token_encoding()
+        token_counts = []
+        for batch_start in range(0, len(lines), TOKEN_BATCH_SIZE):
+            batch = enc.encode_batch(lines[batch_start:batch_start + TOKEN_BATCH_SIZE],
+                                     num_threads=os.cpu_count() or 1)
+            token_counts.extend(len(tokens) + 1 for tokens in batch)
+        
+        # Token counts of the lines in current_chunk and their running sum
+        line_tokens = []
+        running_tokens = 0
+        
         for i, line in enumerate(lines):
             current_chunk.append(line)
+            line_tokens.append(token_counts[i])
+            running_tokens += token_counts[i]
             # Check if we should create a new chunk
-            chunk_code = '\n'.join(current_chunk)
-            enc = tiktoken.encoding_for_model("gpt-4")
-            if len(enc.encode(chunk_code)) > self.max_chunk_size:
+            if running_tokens > self.max_chunk_size:
                 # Find a good splitting point
                 split_point = self.find_split_point(current_chunk)
                 if split_point > 0:
@@ -65,6 +117,8 @@ class CodeChatManager:
                     self.chunks.append(CodeChunk(chunk_code, chunk_start, language))
                     # Start new chunk
                     current_chunk = current_chunk[split_point:]
+                    line_tokens = line_tokens[split_point:]
+                    running_tokens = sum(line_tokens)
                     chunk_start = i - len(current_chunk) + 1
         
         # Add final chunk
@@ -91,10 +145,10 @@ class CodeChatManager:
     
     def format_chunk_html(self, chunk: CodeChunk) -> str:
         """Format code chunk as HTML with syntax highlighting"""
-        try:
-            lexer = get_lexer_by_name(chunk.language)
-        except:
-            lexer = guess_lexer(chunk.formatted_code)
+        chunk.format()
+        lexer = lexer_for_language(chunk.language)
+        if lexer is None:
+            lexer = guessed_lexer(chunk.formatted_code)
         
         highlighted = highlight(
             chunk.formatted_code,
@@ -174,7 +228,7 @@ class CodeAssistant:
     def format_code(self, code: str, language: str = "python") -> str:
         """Format code according to language standards"""
         if language == "python":
-            return autopep8.fix_code(code, options={'aggressive': 1})
+            return format_python(code)
         return code
     
     def analyze_code(self, code: str) -> Dict:
@@ -1,14 +1,116 @@
 import os
+import re
 import sys
 import zlib
 import json
 import struct
 import binascii
 import math
-from collections import defaultdict
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime
 
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+except ImportError:
+    np = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Shortest data whose entropy is computed with numpy; below this the fixed
+# cost of the numpy calls outweighs counting in Python
+NUMPY_ENTROPY_MIN_SIZE = 32
+# Windows _window_entropies_np compares at once; each takes length**2 bytes
+ENTROPY_BLOCK_WINDOWS = 8192
+# ABC blocks plus tag chunks from which process_swf analyzes in parallel
+PARALLEL_MIN_ITEMS = 64
+# Bounds on the output buffer preallocated for a CWS body. The header's file
+# length is untrusted, so it is capped at a plausible deflate ratio of the
+# compressed size and a hard limit; zlib grows the buffer past it if needed
+DECOMPRESS_MAX_RATIO = 64
+DECOMPRESS_MAX_BUFSIZE = 256 * 1024 * 1024
+
+def _entropy_np(arr) -> float:
+    """Calculate Shannon entropy of a uint8 array with numpy.bincount."""
+    counts = np.bincount(arr, minlength=256)
+    probabilities = counts[counts > 0] / arr.size
+    return float(-(probabilities * np.log2(probabilities)).sum())
+
+def _window_entropies_np(arr, length: int, count: int):
+    """Calculate the entropy of arr[i:i+length] for each i in range(count).
+    
+    The windows are rows of a sliding_window_view of arr. Comparing each
+    byte of a row with the whole row gives the count c of its value, and
+    sum(c*log2(c)) over the values is sum(log2(c)) over the bytes. Windows
+    are processed ENTROPY_BLOCK_WINDOWS at a time to bound the comparisons.
+    """
+    count_log = np.zeros(length + 1)
+    count_log[1:] = np.log2(np.arange(1, length + 1))
+    
+    entropies = np.empty(count)
+    for start in range(0, count, ENTROPY_BLOCK_WINDOWS):
+        end = min(start + ENTROPY_BLOCK_WINDOWS, count)
+        windows = sliding_window_view(arr[start:end + length - 1], length)
+        counts = (windows[:, :, None] == windows[:, None, :]).sum(axis=2)
+        entropies[start:end] = count_log[counts].sum(axis=1)
+    return math.log2(length) - entropies / length
+
+def _build_automaton(patterns: List[bytes]):
+    """Build an Aho-Corasick automaton finding patterns, or None without pyahocorasick."""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for pattern in patterns:
+        # The automaton matches str; latin-1 maps each byte to one character
+        automaton.add_word(pattern.decode('latin-1'), pattern)
+    automaton.make_automaton()
+    return automaton
+
+def _find_all(automaton, data: bytes) -> Dict[bytes, List[int]]:
+    """Find the offsets of every occurrence, overlapping ones included, of
+    each automaton pattern in data, in one pass over it."""
+    offsets = defaultdict(list)
+    for end, pattern in automaton.iter(data.decode('latin-1')):
+        offsets[pattern].append(end - len(pattern) + 1)
+    return offsets
+
+def _overlapping_regex(patterns: List[bytes]) -> re.Pattern:
+    """Compile a regex whose finditer finds every occurrence of patterns.
+    
+    Each alternative consumes only the first byte of its pattern and checks
+    the rest in a lookahead, so matching resumes at the next byte and
+    overlapping occurrences are found too; match.lastindex - 1 is the index
+    of the pattern matched. One pattern is found per offset, so no pattern
+    may be a prefix of another.
+    """
+    return re.compile(b'|'.join(
+        re.escape(pattern[:1]) + b'(?=(' + re.escape(pattern[1:]) + b'))'
+        for pattern in patterns
+    ))
+
+def _find_all_regex(regex: re.Pattern, patterns: List[bytes], data: bytes) -> Dict[bytes, List[int]]:
+    """Find the offsets of every occurrence of each pattern in data, in one
+    pass with an _overlapping_regex(patterns)."""
+    offsets = defaultdict(list)
+    for match in regex.finditer(data):
+        offsets[patterns[match.lastindex - 1]].append(match.start())
+    return offsets
+
+def _count_non_overlapping(offsets: List[int], length: int) -> int:
+    """Count occurrences at sorted offsets the way bytes.count does."""
+    count = 0
+    next_free = 0
+    for offset in offsets:
+        if offset >= next_free:
+            count += 1
+            next_free = offset + length
+    return count
+
 class EvonyCryptoAnalyzer:
     def __init__(self):
         """Initialize Evony crypto analyzer."""
@@ -43,6 +145,38 @@ class EvonyCryptoAnalyzer:
         # Common key lengths
         self.key_lengths = [16, 24, 32]  # AES-128, AES-192, AES-256
         
+        # Crypto-related strings in ABC tags
+        self.crypto_keywords = [
+            b'encrypt', b'decrypt', b'cipher', b'key', b'iv', 
+            b'salt', b'hash', b'md5', b'sha1', b'aes', b'des', 
+            b'blowfish', b'rc4', b'base64'
+        ]
+        
+        # Function signatures in ABC tags
+        self.function_patterns = [
+            b'function encrypt', b'function decrypt',
+            b'function hash', b'function generate'
+        ]
+        
+        # Interesting constants in ABC tags
+        self.constant_patterns = [
+            # AES S-box first row
+            bytes.fromhex('637c777bf26b6fc5'),
+            # Common encryption constants
+            bytes.fromhex('0123456789abcdef'),
+            # Common key schedule constants
+            bytes.fromhex('01020408102040801b366cd8ab4d9a2f')
+        ]
+        
+        # With pyahocorasick, all patterns of an analysis are found in one pass
+        self.binary_automaton = _build_automaton(
+            list(self.encryption_patterns) + self.interesting_sequences)
+        self.abc_automaton = _build_automaton(
+            self.crypto_keywords + self.function_patterns + self.constant_patterns)
+        # Otherwise each group of ABC strings is found in one regex pass
+        self.keyword_regex = _overlapping_regex(self.crypto_keywords)
+        self.function_regex = _overlapping_regex(self.function_patterns)
+        
     def analyze_binary_data(self, data: bytes) -> Dict[str, Any]:
         """Analyze binary data for encryption artifacts."""
         results = {
@@ -53,64 +187,88 @@ class EvonyCryptoAnalyzer:
             'patterns': []
         }
         
-        # Look for encryption patterns
-        for pattern, enc_type in self.encryption_patterns.items():
-            if pattern in data:
-                results['potential_encryption'].append({
-                    'type': enc_type,
-                    'offset': data.index(pattern),
-                    'context': data[max(0, data.index(pattern)-16):
-                                  min(len(data), data.index(pattern)+48)].hex()
-                })
-        
-        # Look for interesting sequences
-        for seq in self.interesting_sequences:
-            if seq in data:
-                results['patterns'].append({
-                    'sequence': seq.hex(),
-                    'offset': data.index(seq),
-                    'count': data.count(seq)
-                })
+        if self.binary_automaton is not None:
+            self._match_binary_patterns(data, results)
+        else:
+            # Look for encryption patterns
+            for pattern, enc_type in self.encryption_patterns.items():
+                offset = data.find(pattern)
+                if offset != -1:
+                    results['potential_encryption'].append({
+                        'type': enc_type,
+                        'offset': offset,
+                        'context': data[max(0, offset-16):min(len(data), offset+48)].hex()
+                    })
+            
+            # Look for interesting sequences
+            for seq in self.interesting_sequences:
+                offset = data.find(seq)
+                if offset != -1:
+                    results['patterns'].append({
+                        'sequence': seq.hex(),
+                        'offset': offset,
+                        'count': data.count(seq, offset)
+                    })
         
         # Look for potential keys (high entropy sequences)
         for length in self.key_lengths:
-            for i in range(len(data) - length):
-                chunk = data[i:i+length]
-                entropy = self.calculate_entropy(chunk)
-                if entropy > 7.5:  # High entropy threshold
-                    results['key_candidates'].append({
-                        'offset': i,
-                        'length': length,
-                        'entropy': entropy,
-                        'data': chunk.hex()
-                    })
-        
-        # Look for potential IVs (16 bytes, moderate entropy)
-        for i in range(len(data) - 16):
-            chunk = data[i:i+16]
-            entropy = self.calculate_entropy(chunk)
-            if 6.5 < entropy < 7.5:  # Moderate entropy threshold
-                results['iv_candidates'].append({
+            for i, entropy in self._find_entropy_windows(data, length, 7.5):  # High entropy threshold
+                results['key_candidates'].append({
                     'offset': i,
+                    'length': length,
                     'entropy': entropy,
-                    'data': chunk.hex()
+                    'data': data[i:i+length].hex()
                 })
         
+        # Look for potential IVs (16 bytes, moderate entropy)
+        for i, entropy in self._find_entropy_windows(data, 16, 6.5, 7.5):  # Moderate entropy threshold
+            results['iv_candidates'].append({
+                'offset': i,
+                'entropy': entropy,
+                'data': data[i:i+16].hex()
+            })
+        
         return results
     
+    def _find_entropy_windows(self, data: bytes, length: int, low: float,
+                              high: float = math.inf) -> List[Tuple[int, float]]:
+        """Find the windows data[i:i+length] with low < entropy < high.
+        
+        Returns (offset, entropy) pairs for offsets in range(len(data) - length).
+        """
+        # A window of length bytes has at most log2(length) bits of entropy
+        if math.log2(min(length, 256)) <= low or len(data) <= length:
+            return []
+        
+        count = len(data) - length
+        if np is None:
+            windows = []
+            for i in range(count):
+                entropy = self.calculate_entropy(data[i:i+length])
+                if low < entropy < high:
+                    windows.append((i, entropy))
+            return windows
+        
+        entropies = _window_entropies_np(np.frombuffer(data, dtype=np.uint8), length, count)
+        offsets = np.flatnonzero((entropies > low) & (entropies < high))
+        return [(int(i), float(entropies[i])) for i in offsets]
+    
     def calculate_entropy(self, data: bytes) -> float:
         """Calculate Shannon entropy of byte sequence."""
         if not data:
             return 0.0
         
-        counts = defaultdict(int)
-        for byte in data:
-            counts[byte] += 1
+        if np is not None and len(data) >= NUMPY_ENTROPY_MIN_SIZE:
+            return _entropy_np(np.frombuffer(data, dtype=np.uint8))
+        
+        counts = Counter(data)
         
-        entropy = 0
+        # log2(count / n) == log2(count) - log2(n); every count is positive
+        length = len(data)
+        log2_length = math.log2(length)
+        entropy = 0.0
         for count in counts.values():
-            probability = count / len(data)
-            entropy -= probability * (math.log2(probability) if probability > 0 else 0)
+            entropy -= (count / length) * (math.log2(count) - log2_length)
         
         return entropy
     
@@ -122,20 +280,21 @@ class EvonyCryptoAnalyzer:
             'interesting_constants': []
         }
         
-        # Look for crypto-related strings
-        crypto_keywords = [
-            b'encrypt', b'decrypt', b'cipher', b'key', b'iv', 
-            b'salt', b'hash', b'md5', b'sha1', b'aes', b'des', 
-            b'blowfish', b'rc4', b'base64'
-        ]
+        # Find the offsets of the crypto strings, function signatures and
+        # constants
+        if self.abc_automaton is not None:
+            offsets = _find_all(self.abc_automaton, data)
+        else:
+            offsets = _find_all_regex(self.keyword_regex, self.crypto_keywords, data)
+            offsets.update(_find_all_regex(self.function_regex, self.function_patterns, data))
+            for pattern in self.constant_patterns:
+                offset = data.find(pattern)
+                if offset != -1:
+                    offsets[pattern].append(offset)
         
-        for keyword in crypto_keywords:
-            pos = 0
-            while True:
-                pos = data.find(keyword, pos)
-                if pos == -1:
-                    break
-                    
+        # Look for crypto-related strings
+        for keyword in self.crypto_keywords:
+            for pos in offsets[keyword]:
                 # Get surrounding context
                 start = max(0, pos - 32)
                 end = min(len(data), pos + len(keyword) + 32)
@@ -146,21 +305,10 @@ class EvonyCryptoAnalyzer:
                     'offset': pos,
                     'context': context.hex()
                 })
-                pos += 1
         
         # Look for function signatures
-        function_patterns = [
-            b'function encrypt', b'function decrypt',
-            b'function hash', b'function generate'
-        ]
-        
-        for pattern in function_patterns:
-            pos = 0
-            while True:
-                pos = data.find(pattern, pos)
-                if pos == -1:
-                    break
-                    
+        for pattern in self.function_patterns:
+            for pos in offsets[pattern]:
                 # Get function context
                 start = max(0, pos - 64)
                 end = min(len(data), pos + 256)
@@ -171,29 +319,57 @@ class EvonyCryptoAnalyzer:
                     'offset': pos,
                     'context': context.hex()
                 })
-                pos += 1
         
         # Look for interesting constants
-        constant_patterns = [
-            # AES S-box first row
-            bytes.fromhex('637c777bf26b6fc5'),
-            # Common encryption constants
-            bytes.fromhex('0123456789abcdef'),
-            # Common key schedule constants
-            bytes.fromhex('01020408102040801b366cd8ab4d9a2f')
-        ]
-        
-        for pattern in constant_patterns:
-            if pattern in data:
+        for pattern in self.constant_patterns:
+            if offsets[pattern]:
+                offset = offsets[pattern][0]
                 results['interesting_constants'].append({
                     'pattern': pattern.hex(),
-                    'offset': data.index(pattern),
-                    'context': data[max(0, data.index(pattern)-16):
-                                  min(len(data), data.index(pattern)+48)].hex()
+                    'offset': offset,
+                    'context': data[max(0, offset-16):min(len(data), offset+48)].hex()
                 })
         
         return results
     
+    def _match_binary_patterns(self, data: bytes, results: Dict[str, Any]):
+        """Add the encryption patterns and interesting sequences of data to
+        analyze_binary_data results, finding them all in one pass."""
+        offsets = _find_all(self.binary_automaton, data)
+        
+        for pattern, enc_type in self.encryption_patterns.items():
+            if offsets[pattern]:
+                offset = offsets[pattern][0]
+                results['potential_encryption'].append({
+                    'type': enc_type,
+                    'offset': offset,
+                    'context': data[max(0, offset-16):min(len(data), offset+48)].hex()
+                })
+        
+        for seq in self.interesting_sequences:
+            if offsets[seq]:
+                results['patterns'].append({
+                    'sequence': seq.hex(),
+                    'offset': offsets[seq][0],
+                    'count': _count_non_overlapping(offsets[seq], len(seq))
+                })
+    
+    def _analyze_tags(self, abc_data: List[bytes],
+                      chunks: List[bytes]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Run analyze_abc_tag on each ABC block and analyze_binary_data on each chunk.
+        
+        The analyses are independent, so with PARALLEL_MIN_ITEMS or more
+        they are spread over worker processes. Results keep the input order.
+        """
+        if len(abc_data) + len(chunks) < PARALLEL_MIN_ITEMS:
+            return ([self.analyze_abc_tag(data) for data in abc_data],
+                    [self.analyze_binary_data(chunk) for chunk in chunks])
+        
+        with ProcessPoolExecutor(initializer=_init_worker, initargs=(self,)) as executor:
+            abc_analyses = executor.map(_analyze_abc_tag, abc_data)
+            chunk_analyses = executor.map(_analyze_binary_data, chunks, chunksize=8)
+            return list(abc_analyses), list(chunk_analyses)
+    
     def process_swf(self, file_path: str) -> bool:
         """Process a SWF file for crypto analysis."""
         try:
@@ -206,18 +382,28 @@ class EvonyCryptoAnalyzer:
             # Check compression
             signature = data[:3].decode('ascii')
             if signature == 'CWS':
-                # Decompress
-                body = zlib.decompress(data[8:])
-                data = data[:8] + body
-            elif signature != 'FWS':
+                # Decompress the body without rejoining it to the header; the
+                # header's file length sizes the output buffer up front
+                file_length = struct.unpack_from('<I', data, 4)[0]
+                bufsize = min(file_length - 8, (len(data) - 8) * DECOMPRESS_MAX_RATIO,
+                              DECOMPRESS_MAX_BUFSIZE)
+                data = zlib.decompress(memoryview(data)[8:],
+                                       bufsize=max(bufsize, zlib.DEF_BUF_SIZE))
+                body_start = 0
+            elif signature == 'FWS':
+                body_start = 8
+            else:
                 print("Not a valid SWF file")
                 return False
+            # File offset of data[0]
+            base_offset = 8 - body_start
+            view = memoryview(data)
             
             # Initialize analysis
             analysis = {
                 'file_info': {
                     'path': file_path,
-                    'size': len(data),
+                    'size': base_offset + len(data),
                     'compressed': signature == 'CWS'
                 },
                 'encryption_analysis': [],
@@ -230,64 +416,74 @@ class EvonyCryptoAnalyzer:
                 }
             }
             
-            # Process ABC tags
-            offset = 8
+            # Collect the DoABC tags and the tag data chunks to analyze
+            abc_tags = []
+            chunks = []
+            chunk_size = 4096
+            offset = body_start
             while offset < len(data):
                 # Read tag header
-                tag_code_and_length = struct.unpack('<H', data[offset:offset+2])[0]
+                tag_code_and_length = struct.unpack_from('<H', data, offset)[0]
                 tag_code = tag_code_and_length >> 6
                 tag_length = tag_code_and_length & 0x3F
                 header_size = 2
                 
                 if tag_length == 0x3F:
-                    tag_length = struct.unpack('<I', data[offset+2:offset+6])[0]
+                    tag_length = struct.unpack_from('<I', data, offset+2)[0]
                     header_size = 6
                 
                 # Process DoABC tags
                 if tag_code == 82:  # DoABC
-                    tag_data = data[offset+header_size:offset+header_size+tag_length]
-                    flags = struct.unpack('<I', tag_data[:4])[0]
-                    name_end = tag_data.find(b'\x00', 4)
-                    name = tag_data[4:name_end].decode('utf-8', 'ignore')
-                    abc_data = tag_data[name_end+1:]
-                    
-                    # Analyze ABC data
-                    abc_analysis = self.analyze_abc_tag(abc_data)
-                    analysis['abc_analysis'].append({
-                        'name': name,
-                        'flags': flags,
-                        'analysis': abc_analysis
-                    })
-                    
-                    # Update summary
-                    analysis['summary']['crypto_functions'] += len(abc_analysis['potential_functions'])
-                    analysis['summary']['interesting_constants'] += len(abc_analysis['interesting_constants'])
+                    tag_data = view[offset+header_size:offset+header_size+tag_length]
+                    flags = struct.unpack_from('<I', tag_data)[0]
+                    name_end = data.find(b'\x00', offset+header_size+4,
+                                         offset+header_size+tag_length)
+                    if name_end != -1:
+                        name_end -= offset + header_size
+                    name = str(tag_data[4:name_end], 'utf-8', 'ignore')
+                    abc_tags.append((name, flags, bytes(tag_data[name_end+1:])))
                 
                 # Analyze binary data in chunks
-                chunk_size = 4096
                 for i in range(0, tag_length, chunk_size):
-                    chunk = data[offset+header_size+i:
-                               min(offset+header_size+i+chunk_size, 
-                                   offset+header_size+tag_length)]
-                    
-                    chunk_analysis = self.analyze_binary_data(chunk)
-                    if (chunk_analysis['potential_encryption'] or 
-                        chunk_analysis['key_candidates'] or 
-                        chunk_analysis['patterns']):
-                        
-                        analysis['encryption_analysis'].append({
-                            'offset': offset + header_size + i,
-                            'analysis': chunk_analysis
-                        })
-                        
-                        # Update summary
-                        analysis['summary']['potential_encryption_methods'].update(
-                            enc['type'] for enc in chunk_analysis['potential_encryption']
-                        )
-                        analysis['summary']['key_candidates'] += len(chunk_analysis['key_candidates'])
+                    chunks.append((base_offset + offset + header_size + i,
+                                   data[offset+header_size+i:
+                                        min(offset+header_size+i+chunk_size,
+                                            offset+header_size+tag_length)]))
                 
                 offset += header_size + tag_length
             
+            abc_analyses, chunk_analyses = self._analyze_tags(
+                [abc_data for _, _, abc_data in abc_tags],
+                [chunk for _, chunk in chunks]
+            )
+            
+            for (name, flags, _), abc_analysis in zip(abc_tags, abc_analyses):
+                analysis['abc_analysis'].append({
+                    'name': name,
+                    'flags': flags,
+                    'analysis': abc_analysis
+                })
+                
+                # Update summary
+                analysis['summary']['crypto_functions'] += len(abc_analysis['potential_functions'])
+                analysis['summary']['interesting_constants'] += len(abc_analysis['interesting_constants'])
+            
+            for (chunk_offset, _), chunk_analysis in zip(chunks, chunk_analyses):
+                if (chunk_analysis['potential_encryption'] or 
+                    chunk_analysis['key_candidates'] or 
+                    chunk_analysis['patterns']):
+                    
+                    analysis['encryption_analysis'].append({
+                        'offset': chunk_offset,
+                        'analysis': chunk_analysis
+                    })
+                    
+                    # Update summary
+                    analysis['summary']['potential_encryption_methods'].update(
+                        enc['type'] for enc in chunk_analysis['potential_encryption']
+                    )
+                    analysis['summary']['key_candidates'] += len(chunk_analysis['key_candidates'])
+            
             # Convert summary set to list for JSON serialization
             analysis['summary']['potential_encryption_methods'] = list(
                 analysis['summary']['potential_encryption_methods']
@@ -353,6 +549,21 @@ class EvonyCryptoAnalyzer:
             print(f"Error processing file: {e}")
             return False
 
+_worker_analyzer: Optional[EvonyCryptoAnalyzer] = None
+
+def _init_worker(analyzer: EvonyCryptoAnalyzer):
+    """Set the analyzer used by this worker process."""
+    global _worker_analyzer
+    _worker_analyzer = analyzer
+
+def _analyze_abc_tag(data: bytes) -> Dict[str, Any]:
+    """Run analyze_abc_tag in a worker process."""
+    return _worker_analyzer.analyze_abc_tag(data)
+
+def _analyze_binary_data(chunk: bytes) -> Dict[str, Any]:
+    """Run analyze_binary_data in a worker process."""
+    return _worker_analyzer.analyze_binary_data(chunk)
+
 if __name__ == "__main__":
     if len(sys.argv) != 2:
         print("Usage: python evony_crypto_analyzer.py <swf_file>")
@@ -2,6 +2,7 @@
 import logging
 import os
 import subprocess
+import tempfile
 from typing import Dict, List, Optional, Tuple
 from ..utils.encryption import EncryptionAnalyzer
 
@@ -29,9 +30,10 @@ class ABCAnalyzer:
                 self.logger.info(f"ABC tag is encrypted using {encryption_info['method']}")
                 tag_data = self.encryption_analyzer.decrypt_tag(tag_data, encryption_info)
             
-            # Save ABC data to temporary file
-            temp_abc = os.path.join(output_dir, "temp.abc")
-            with open(temp_abc, "wb") as f:
+            # Save ABC data to a uniquely named temporary file, since several
+            # tags may be processed into the same output directory at once
+            fd, temp_abc = tempfile.mkstemp(suffix=".abc", dir=output_dir)
+            with os.fdopen(fd, "wb") as f:
                 f.write(tag_data)
                 
             # Use AS3 Sorcerer to decompile
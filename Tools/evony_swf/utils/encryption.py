@@ -63,7 +63,11 @@ class EncryptionAnalyzer:
         self.logger = logging.getLogger(__name__)
         
     def analyze_tag(self, tag_data: bytes, tag_code: int) -> Dict:
-        """Analyze a tag for encryption."""
+        """Analyze a tag for encryption.
+        
+        tag_data may be any bytes-like object (e.g. a memoryview over a
+        memory-mapped file); returned data is always materialized as bytes.
+        """
         result = {
             'encrypted': False,
             'method': None,
@@ -158,7 +162,7 @@ class EncryptionAnalyzer:
     def decrypt_tag(self, tag_data: bytes, encryption_info: Dict) -> bytes:
         """Decrypt a tag using the detected encryption method."""
         if not encryption_info['encrypted']:
-            return tag_data
+            return bytes(tag_data)
             
         try:
             # If we already have decrypted data, return it
@@ -172,7 +176,7 @@ class EncryptionAnalyzer:
                 header_size = 0
                 
             # Split header and encrypted data
-            header = tag_data[:header_size]
+            header = bytes(tag_data[:header_size])
             encrypted_data = tag_data[header_size:]
             
             if encryption_info['method'] == 'rc4':
@@ -191,14 +195,14 @@ class EncryptionAnalyzer:
                         
             else:
                 self.logger.warning(f"Unknown encryption method: {encryption_info['method']}")
-                return tag_data
+                return bytes(tag_data)
                 
             # Combine header and decrypted data
             return header + decrypted
             
         except Exception as e:
             self.logger.error(f"Error decrypting tag: {str(e)}")
-            return tag_data
+            return bytes(tag_data)
             
     def _try_rc4_decrypt(self, data: bytes, key: bytes) -> bytes:
         """Try RC4 decryption."""
@@ -207,7 +211,7 @@ class EncryptionAnalyzer:
             return cipher.decrypt(data)
         except Exception as e:
             self.logger.debug(f"RC4 decryption failed: {str(e)}")
-            return data
+            return bytes(data)
             
     def _try_xor_decrypt(self, data: bytes, pattern: bytes) -> bytes:
         """Try XOR decryption."""
@@ -236,7 +240,7 @@ class EncryptionAnalyzer:
         ]
         
         # Check first 1KB for patterns
-        sample = data[:1024]
+        sample = bytes(data[:1024])
         
         # Check for valid patterns
         if any(pattern in sample for pattern in patterns):
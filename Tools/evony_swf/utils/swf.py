@@ -1,5 +1,6 @@
 """SWF file format utilities."""
 import logging
+import struct
 import zlib
 import lzma
 from typing import Optional, Dict, List, Tuple
@@ -10,8 +11,7 @@ def read_swf_header(data: bytes) -> dict:
         raise ValueError("Invalid SWF file (too small)")
         
     signature = data[:3].decode('ascii')
-    version = data[3]
-    length = int.from_bytes(data[4:8], 'little')
+    version, length = struct.unpack_from('<BI', data, 3)
     
     header = {
         'signature': signature,
@@ -36,7 +36,7 @@ def parse_swf_tag(data: bytes) -> Tuple[int, int, bytes]:
         raise ValueError("Invalid tag data (too small)")
         
     # Read tag code and length
-    tag_header = int.from_bytes(data[0:2], 'little')
+    tag_header, = struct.unpack_from('<H', data)
     tag_code = tag_header >> 6
     tag_length = tag_header & 0x3F
     
@@ -44,7 +44,7 @@ def parse_swf_tag(data: bytes) -> Tuple[int, int, bytes]:
     if tag_length == 0x3F:
         if len(data) < 6:
             raise ValueError("Invalid long tag data")
-        tag_length = int.from_bytes(data[2:6], 'little')
+        tag_length, = struct.unpack_from('<I', data, 2)
         tag_data = data[6:6+tag_length]
     else:
         tag_data = data[2:2+tag_length]
@@ -0,0 +1,35 @@
+"""Convert newline-delimited JSON results into a single JSON array."""
+import json
+
+def ndjson_to_json(ndjson_path: str, json_path: str) -> int:
+    """
+    Concatenate the records of an NDJSON file into a JSON array file.
+
+    Args:
+        ndjson_path: Path to the NDJSON input, one JSON object per line
+        json_path: Path of the JSON array file to write
+
+    Returns:
+        Number of records written
+    """
+    records = []
+    with open(ndjson_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, indent=2)
+
+    return len(records)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Convert NDJSON analysis results to a JSON array')
+    parser.add_argument('input', help='Path to the NDJSON file')
+    parser.add_argument('--output', '-o', required=True, help='Output JSON file path')
+
+    args = parser.parse_args()
+    count = ndjson_to_json(args.input, args.output)
+    print(f"Wrote {count} records to {args.output}")
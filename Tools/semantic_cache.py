@@ -0,0 +1,230 @@
+import atexit
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+logger = logging.getLogger(__name__)
+
+
+def _top1_numpy(query, matrix) -> Tuple[int, float]:
+    """Return the index and score of the row of matrix closest to query"""
+    similarities = matrix @ query
+    index = int(np.argmax(similarities))
+    return index, float(similarities[index])
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _top1(query, matrix):
+        """Numba version of _top1_numpy with the dot products fused per row"""
+        rows, dims = matrix.shape
+        scores = np.empty(rows, dtype=np.float32)
+        for i in prange(rows):
+            score = np.float32(0.0)
+            for k in range(dims):
+                score += query[k] * matrix[i, k]
+            scores[i] = score
+        # The argmax stays serial: a shared best/index pair updated inside
+        # prange would race between threads
+        best = -np.inf
+        index = -1
+        for i in range(rows):
+            if scores[i] > best:
+                best = scores[i]
+                index = i
+        return index, best
+else:
+    _top1 = _top1_numpy
+
+
+class SemanticCache:
+    """Caches AI responses by embedding similarity of the prompt
+
+    Entries are bucketed by an exact key (model, temperature, ...) and each
+    bucket holds a row-normalized (N, D) embedding matrix, so a lookup is a
+    single matrix-vector product followed by an argmax.
+
+    New entries are written to disk save_delay seconds after the first
+    unsaved put() and at interpreter exit, off the request path.
+    """
+
+    def __init__(self, path: Path, threshold: float = 0.87,
+                 model_name: str = 'all-MiniLM-L6-v2', max_entries: int = 1000,
+                 backend: str = 'onnx', save_delay: float = 5.0):
+        """
+        Args:
+            path: Base path of the cache; '.npz' and '.json' files are
+                written next to each other using this stem
+            threshold: Minimum cosine similarity for a cache hit
+            model_name: sentence-transformers model used for embeddings
+            max_entries: Maximum number of entries kept per bucket
+            backend: Preferred sentence-transformers backend; the default
+                torch backend is used if it cannot be loaded
+            save_delay: Seconds to batch new entries before saving them
+        """
+        self.path = Path(path)
+        self.threshold = threshold
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.backend = backend
+        self._model = None
+        self._model_ready = threading.Event()
+        self._loader: Optional[threading.Thread] = None
+        self._buckets: Dict[str, Tuple['np.ndarray', List[str]]] = {}
+        self.save_delay = save_delay
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self.load()
+        atexit.register(self.flush)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the optional embedding dependencies are installed"""
+        return np is not None and SentenceTransformer is not None
+
+    @property
+    def _matrix_file(self) -> Path:
+        return self.path.with_suffix('.npz')
+
+    @property
+    def _index_file(self) -> Path:
+        return self.path.with_suffix('.json')
+
+    def warm_up(self):
+        """Start loading the embedding model on a background thread"""
+        if self.enabled and self._loader is None:
+            self._loader = threading.Thread(target=self._load_model, daemon=True)
+            self._loader.start()
+
+    def _load_model(self):
+        """Load the embedding model and run one encode to initialize it"""
+        try:
+            try:
+                model = SentenceTransformer(self.model_name, backend=self.backend)
+            except Exception:
+                model = SentenceTransformer(self.model_name)
+            model.encode("warmup")
+            self._model = model
+        except Exception as e:
+            logger.warning(f"Could not load embedding model: {e}")
+        finally:
+            self._model_ready.set()
+
+    def embed(self, text: str) -> Optional['np.ndarray']:
+        """Return the normalized embedding of text, or None if disabled"""
+        if not self.enabled:
+            return None
+        self.warm_up()
+        self._model_ready.wait()
+        if self._model is None:
+            return None
+        vector = self._model.encode(text, normalize_embeddings=True)
+        return np.asarray(vector, dtype=np.float32)
+
+    def get(self, embedding: Optional['np.ndarray'], key: str) -> Optional[str]:
+        """Return the cached response most similar to embedding, if any"""
+        if embedding is None or key not in self._buckets:
+            return None
+        matrix, responses = self._buckets[key]
+        index, similarity = _top1(embedding, matrix)
+        if similarity >= self.threshold:
+            return responses[int(index)]
+        return None
+
+    def put(self, embedding: Optional['np.ndarray'], key: str, response: str):
+        """Store a response under its prompt embedding"""
+        if embedding is None:
+            return
+        row = embedding.reshape(1, -1)
+        with self._lock:
+            if key in self._buckets:
+                matrix, responses = self._buckets[key]
+                matrix = np.vstack([matrix, row])[-self.max_entries:]
+                responses = (responses + [response])[-self.max_entries:]
+            else:
+                matrix, responses = row, [response]
+            self._buckets[key] = (matrix, responses)
+            self._dirty = True
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(self.save_delay, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def flush(self):
+        """Save the cache now if it has unsaved entries"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+            # Buckets are replaced, never modified, so a shallow copy is a
+            # consistent snapshot to write without holding the lock
+            buckets = dict(self._buckets)
+        self.save(buckets)
+
+    def load(self):
+        """Load cached entries from disk"""
+        if not self.enabled or not self._index_file.exists():
+            return
+        try:
+            with open(self._index_file, 'r') as f:
+                index = json.load(f)
+            with np.load(self._matrix_file) as matrices:
+                for i, bucket in enumerate(index):
+                    self._buckets[bucket['key']] = (
+                        matrices[f'bucket_{i}'].astype(np.float32),
+                        bucket['responses']
+                    )
+        except Exception as e:
+            logger.warning(f"Could not load semantic cache: {e}")
+            self._buckets = {}
+
+    def save(self, buckets: Optional[Dict[str, Tuple['np.ndarray', List[str]]]] = None):
+        """Persist cached entries as an .npz matrix file and JSON sidecar"""
+        if not self.enabled:
+            return
+        if buckets is None:
+            with self._lock:
+                buckets = dict(self._buckets)
+        index = []
+        matrices = {}
+        for i, (key, (matrix, responses)) in enumerate(buckets.items()):
+            index.append({'key': key, 'responses': responses})
+            matrices[f'bucket_{i}'] = matrix
+        with self._save_lock:
+            np.savez(self._matrix_file, **matrices)
+            with open(self._index_file, 'w') as f:
+                json.dump(index, f)
+
+    def clear(self):
+        """Remove all cached entries"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            self._dirty = False
+            self._buckets = {}
+        for file in (self._matrix_file, self._index_file):
+            if file.exists():
+                file.unlink()
@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 from datetime import datetime
 import json
@@ -70,10 +71,9 @@ class SWFAnalyzer:
                 'is_compressed': self._is_compressed(file_path)
             }
             
-            # Analyze each ABC file
-            for abc_file in abc_files:
-                abc_info = self._analyze_abc_file(abc_file)
-                structure['abc_files'].append(abc_info)
+            # Analyze ABC files concurrently; disassembly runs in subprocesses
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                structure['abc_files'].extend(executor.map(self._analyze_abc_file, abc_files))
             
             return structure
             
@@ -139,9 +139,12 @@ class SWFAnalyzer:
     
     def _get_file_hash(self, file_path: str) -> str:
         """Calculate SHA256 hash of a file"""
-        sha256_hash = hashlib.sha256()
         with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
+            # file_digest (Python 3.11+) runs the read/update loop in C
+            if hasattr(hashlib, 'file_digest'):
+                return hashlib.file_digest(f, 'sha256').hexdigest()
+            sha256_hash = hashlib.sha256()
+            for byte_block in iter(lambda: f.read(1 << 20), b""):
                 sha256_hash.update(byte_block)
         return sha256_hash.hexdigest()
     
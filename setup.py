@@ -34,6 +34,7 @@ setup(
         "anthropic>=0.8.0",
         "python-dotenv>=1.0.0",
         "requests>=2.31.0",
+        "httpx>=0.25.0",
         "openrouter>=0.3.0",
         "PyQt6-QScintilla>=2.14.1",
         "watchdog>=3.0.0",
@@ -0,0 +1,104 @@
+"""
+Test suite for the search helpers of the crypto analyzer
+"""
+
+import random
+import pytest
+
+from Tools.crypto import crypto_analyzer
+from Tools.crypto.crypto_analyzer import EvonyCryptoAnalyzer
+
+def _sample_data(size, alphabet, seed):
+    """Random bytes drawn from the first alphabet byte values"""
+    rng = random.Random(seed)
+    return bytes(rng.randrange(alphabet) for _ in range(size))
+
+class TestEntropyWindows:
+    @pytest.fixture
+    def analyzer(self, tmp_path, monkeypatch):
+        # The analyzer creates its output directory in the working directory
+        monkeypatch.chdir(tmp_path)
+        return EvonyCryptoAnalyzer()
+
+    @pytest.mark.parametrize('length, low, high, alphabet', [
+        (16, 2.5, 3.9, 12),
+        (16, 3.1, float('inf'), 256),
+        (24, 3.5, 4.4, 20),
+        (32, 4.2, 4.9, 40),
+        (40, 4.0, 5.1, 64),
+    ])
+    def test_matches_calculate_entropy(self, analyzer, monkeypatch, length, low, high, alphabet):
+        """Vectorized windows agree with calculate_entropy on every window"""
+        pytest.importorskip('numpy')
+        # Small blocks so the block boundaries are crossed too
+        monkeypatch.setattr(crypto_analyzer, 'ENTROPY_BLOCK_WINDOWS', 7)
+        data = _sample_data(300, alphabet, length)
+
+        expected = []
+        for i in range(len(data) - length):
+            entropy = analyzer.calculate_entropy(data[i:i+length])
+            if low < entropy < high:
+                expected.append((i, entropy))
+
+        windows = analyzer._find_entropy_windows(data, length, low, high)
+        assert expected, "thresholds should select some windows"
+        assert [i for i, _ in windows] == [i for i, _ in expected]
+        assert [e for _, e in windows] == pytest.approx([e for _, e in expected])
+
+    @pytest.mark.parametrize('data, length, low', [
+        (bytes(range(64)), 16, 4.0),     # entropy of 16 bytes is at most 4
+        (bytes(range(64)), 32, 7.5),
+        (bytes(range(16)), 16, 1.0),     # no window fits before the end
+        (b'', 16, 1.0),
+    ])
+    def test_no_windows(self, analyzer, data, length, low):
+        """Thresholds no window can reach, or too little data, find nothing"""
+        assert analyzer._find_entropy_windows(data, length, low) == []
+
+class TestPatternSearch:
+    @pytest.mark.parametrize('patterns, data, expected', [
+        ([b'aa'], b'aaaa', {b'aa': [0, 1, 2]}),
+        ([b'aba', b'ba'], b'ababa', {b'aba': [0, 2], b'ba': [1, 3]}),
+        ([b'key', b'iv'], b'ivkeyiv', {b'iv': [0, 5], b'key': [2]}),
+        ([b'=', b'x'], b'a==', {b'=': [1, 2]}),
+        ([b'md5'], b'MD5 md', {}),
+        ([b'\x00\x01', b'\x01\x00'], b'\x00\x01\x00\x01', {b'\x00\x01': [0, 2], b'\x01\x00': [1]}),
+    ])
+    def test_overlapping_regex(self, patterns, data, expected):
+        """Every occurrence is found, overlapping ones included"""
+        regex = crypto_analyzer._overlapping_regex(patterns)
+        assert dict(crypto_analyzer._find_all_regex(regex, patterns, data)) == expected
+
+    def test_overlapping_regex_needs_prefix_free_patterns(self):
+        """Only one pattern is reported per offset, so prefixes are lost"""
+        patterns = [b'key', b'keys']
+        regex = crypto_analyzer._overlapping_regex(patterns)
+        assert dict(crypto_analyzer._find_all_regex(regex, patterns, b'keys')) == {b'key': [0]}
+
+    @pytest.mark.parametrize('patterns, data', [
+        ([b'aa'], b'aaaa'),
+        ([b'=', b'=='], b'a===b='),
+        ([b'key', b'keys', b'iv'], b'keys ivkey'),
+        ([b'\x00\x01', b'\x01'], b'\x00\x01\x01\xff'),
+    ])
+    def test_find_all(self, patterns, data):
+        """The automaton reports each occurrence, prefixes included"""
+        automaton = crypto_analyzer._build_automaton(patterns)
+        if automaton is None:
+            pytest.skip("pyahocorasick is not installed")
+        found = crypto_analyzer._find_all(automaton, data)
+        for pattern in patterns:
+            expected = [i for i in range(len(data)) if data.startswith(pattern, i)]
+            assert sorted(found.get(pattern, [])) == expected
+
+    @pytest.mark.parametrize('pattern, data', [
+        (b'a', b''),
+        (b'aa', b'aaaaa'),
+        (b'aba', b'abababa'),
+        (b'==', b'a=====b=='),
+        (b'xyz', b'xyzxy xyz'),
+    ])
+    def test_count_non_overlapping(self, pattern, data):
+        """Counting from all offsets agrees with bytes.count"""
+        offsets = [i for i in range(len(data)) if data.startswith(pattern, i)]
+        assert crypto_analyzer._count_non_overlapping(offsets, len(pattern)) == data.count(pattern)
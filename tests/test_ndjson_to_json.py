@@ -0,0 +1,35 @@
+"""
+Test suite for converting NDJSON results to a JSON array
+"""
+
+import json
+import pytest
+
+from Tools.ndjson_to_json import ndjson_to_json
+
+class TestNdjsonToJson:
+    @pytest.mark.parametrize('lines, expected', [
+        ([], []),
+        (['{"a": 1}'], [{'a': 1}]),
+        (['{"a": 1}', '{"b": [2, 3]}'], [{'a': 1}, {'b': [2, 3]}]),
+        (['', '{"a": 1}', '   ', '{"b": null}', ''], [{'a': 1}, {'b': None}]),
+        (['{"name": "caf\\u00e9"}', '{"name": "café"}'], [{'name': 'café'}, {'name': 'café'}]),
+    ])
+    def test_convert(self, tmp_path, lines, expected):
+        """Records are written in order and blank lines are skipped"""
+        ndjson_path = tmp_path / 'results.ndjson'
+        json_path = tmp_path / 'results.json'
+        ndjson_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+        count = ndjson_to_json(str(ndjson_path), str(json_path))
+
+        assert count == len(expected)
+        assert json.loads(json_path.read_text(encoding='utf-8')) == expected
+
+    def test_invalid_line(self, tmp_path):
+        """A malformed record is an error, not silently dropped"""
+        ndjson_path = tmp_path / 'results.ndjson'
+        ndjson_path.write_text('{"a": 1}\n{"a": \n', encoding='utf-8')
+
+        with pytest.raises(json.JSONDecodeError):
+            ndjson_to_json(str(ndjson_path), str(tmp_path / 'results.json'))